@@ -0,0 +1,283 @@
+"""
+Numeric kernels for the prediction service.
+
+Each kernel is compiled with numba when it is installed; otherwise an
+equivalent NumPy (or plain Python, for the scalar scoring loops)
+implementation is used.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # Optional: fall back to the NumPy implementations
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True)
+    def prediction_features(preds):
+        """Per-row (sum, evens, highs) of an (n, 5) integer array"""
+        n = preds.shape[0]
+        out = np.empty((n, 3), np.int32)
+        for i in range(n):
+            s = 0
+            e = 0
+            h = 0
+            for j in range(preds.shape[1]):
+                v = preds[i, j]
+                s += v
+                e += 1 - (v & 1)
+                h += v > 45
+            out[i, 0] = s
+            out[i, 1] = e
+            out[i, 2] = h
+        return out
+else:
+    def prediction_features(preds: np.ndarray) -> np.ndarray:
+        """Per-row (sum, evens, highs) of an (n, 5) integer array"""
+        out = np.empty((preds.shape[0], 3), np.int32)
+        preds.sum(axis=1, out=out[:, 0])
+        (~preds & 1).sum(axis=1, out=out[:, 1])
+        (preds > 45).sum(axis=1, out=out[:, 2])
+        return out
+
+
+def score_gaps(pred, ideal_lo, ideal_hi, gap_weights):
+    """
+    Unclamped gap score of a sorted 5-number prediction.
+
+    gap_weights[g] is the common-gap weight of gap g (count / top count),
+    or -1 when g is not a common gap.
+    """
+    in_range = 0
+    consecutive = 0
+    large = 0
+    for i in range(1, 5):
+        g = pred[i] - pred[i - 1]
+        if ideal_lo <= g <= ideal_hi:
+            in_range += 1
+        if g == 1:
+            consecutive += 1
+        if g > 30:
+            large += 1
+
+    score = in_range * 0.15
+    for i in range(1, 5):
+        g = pred[i] - pred[i - 1]
+        if g < gap_weights.shape[0] and gap_weights[g] >= 0:
+            score += 0.1 * gap_weights[g]
+    score -= consecutive * 0.1
+    score -= large * 0.1
+    return score
+
+
+def score_positions(pred, position_rank):
+    """
+    Position score of a sorted 5-number prediction.
+
+    position_rank[pos, n] is n's rank among the favorites for position pos,
+    or -1 when n is not a favorite.
+    """
+    score = 0.0
+    for pos in range(5):
+        rank = position_rank[pos, pred[pos]]
+        if rank < 0:
+            continue
+        if rank < 5:
+            score += 0.15
+        elif rank < 10:
+            score += 0.1
+        else:
+            score += 0.05
+    return min(1.0, score)
+
+
+if njit is not None:
+    score_gaps = njit(cache=True)(score_gaps)
+    score_positions = njit(cache=True)(score_positions)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def population_fitness(pop, prob_vec, has_sum, sum_lo, sum_hi, even_ok, high_ok):
+        """
+        Genetic-optimizer fitness of every row of an (n, 5) array of
+        ascending-sorted individuals.
+
+        The sum range applies only when has_sum is set; even_ok[k] / high_ok[k]
+        mark the wanted counts of even / high (> 45) numbers.
+        """
+        n = pop.shape[0]
+        out = np.empty(n)
+        for i in range(n):
+            prob = 0.0
+            total = 0
+            evens = 0
+            highs = 0
+            consecutive = 0
+            for j in range(pop.shape[1]):
+                v = pop[i, j]
+                prob += prob_vec[v]
+                total += v
+                evens += 1 - (v & 1)
+                highs += v > 45
+                if j > 0 and v - pop[i, j - 1] == 1:
+                    consecutive += 1
+
+            score = 1.0
+            if has_sum:
+                score *= 1.2 if sum_lo <= total <= sum_hi else 0.8
+            if even_ok[evens]:
+                score *= 1.1
+            if high_ok[highs]:
+                score *= 1.1
+            out[i] = prob * score - consecutive * 0.1
+        return out
+else:
+    def population_fitness(pop: np.ndarray, prob_vec: np.ndarray, has_sum: bool, sum_lo, sum_hi,
+                           even_ok: np.ndarray, high_ok: np.ndarray) -> np.ndarray:
+        """
+        Genetic-optimizer fitness of every row of an (n, 5) array of
+        ascending-sorted individuals.
+
+        The sum range applies only when has_sum is set; even_ok[k] / high_ok[k]
+        mark the wanted counts of even / high (> 45) numbers.
+        """
+        # One contiguous array per slot, so every reduction is a sweep
+        # down contiguous memory rather than a stride across rows
+        cols = np.ascontiguousarray(pop.T)
+        prob = prob_vec[cols].sum(axis=0)
+        score = np.ones(cols.shape[1])
+        if has_sum:
+            totals = cols.sum(axis=0)
+            score *= np.where((sum_lo <= totals) & (totals <= sum_hi), 1.2, 0.8)
+        score *= np.where(even_ok[(~cols & 1).sum(axis=0)], 1.1, 1.0)
+        score *= np.where(high_ok[(cols > 45).sum(axis=0)], 1.1, 1.0)
+        consecutive = (cols[1:] - cols[:-1] == 1).sum(axis=0)
+        return prob * score - consecutive * 0.1
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def number_samples(base_rows, number_freq, in_draw, number_col, freq_col):
+        """
+        Expand per-draw feature rows into one training sample per number.
+
+        Row i * 90 + k of X is base_rows[i] with the number k + 1 and its
+        frequency number_freq[i, k + 1] in number_col / freq_col; y is
+        in_draw[i, k + 1]. X and y take the dtypes of base_rows and in_draw.
+        """
+        n, f = base_rows.shape
+        X = np.empty((n * 90, f), base_rows.dtype)
+        y = np.empty(n * 90, in_draw.dtype)
+        for i in prange(n):
+            for k in range(90):
+                r = i * 90 + k
+                X[r] = base_rows[i]
+                X[r, number_col] = k + 1
+                X[r, freq_col] = number_freq[i, k + 1]
+                y[r] = in_draw[i, k + 1]
+        return X, y
+else:
+    def number_samples(base_rows: np.ndarray, number_freq: np.ndarray, in_draw: np.ndarray,
+                       number_col: int, freq_col: int):
+        """
+        Expand per-draw feature rows into one training sample per number.
+
+        Row i * 90 + k of X is base_rows[i] with the number k + 1 and its
+        frequency number_freq[i, k + 1] in number_col / freq_col; y is
+        in_draw[i, k + 1]. X and y take the dtypes of base_rows and in_draw.
+        """
+        n = base_rows.shape[0]
+        X = np.repeat(base_rows, 90, axis=0)
+        X[:, number_col] = np.tile(np.arange(1, 91), n)
+        X[:, freq_col] = number_freq[:, 1:].ravel()
+        y = in_draw[:, 1:].ravel()
+        return X, y
+
+
+if njit is not None:
+    @njit(cache=True)
+    def rate_patterns(rates):
+        """
+        Per-column (cyclical, rising) masks of a (years, numbers) rate matrix.
+
+        A column is cyclical when every three consecutive years go
+        high-low-high or low-high-low (needs 3+ years), and rising when it
+        never decreases or its last rate is over 1.3x the one before.
+        """
+        n_years, n_nums = rates.shape
+        cyclical = np.zeros(n_nums, np.bool_)
+        rising = np.zeros(n_nums, np.bool_)
+        for k in range(n_nums):
+            alternating = n_years >= 3
+            for i in range(n_years - 2):
+                a = rates[i, k]
+                b = rates[i + 1, k]
+                c = rates[i + 2, k]
+                if not ((a > b and b < c) or (a < b and b > c)):
+                    alternating = False
+                    break
+            cyclical[k] = alternating
+
+            monotone = True
+            for i in range(n_years - 1):
+                if not rates[i, k] <= rates[i + 1, k]:
+                    monotone = False
+                    break
+            rising[k] = monotone or (n_years >= 2 and rates[n_years - 1, k] > rates[n_years - 2, k] * 1.3)
+        return cyclical, rising
+else:
+    def rate_patterns(rates: np.ndarray):
+        """
+        Per-column (cyclical, rising) masks of a (years, numbers) rate matrix.
+
+        A column is cyclical when every three consecutive years go
+        high-low-high or low-high-low (needs 3+ years), and rising when it
+        never decreases or its last rate is over 1.3x the one before.
+        """
+        a, b, c = rates[:-2], rates[1:-1], rates[2:]
+        cyclical = (((a > b) & (b < c)) | ((a < b) & (b > c))).all(axis=0) & (len(rates) >= 3)
+        rising = (rates[:-1] <= rates[1:]).all(axis=0)
+        if len(rates) >= 2:
+            rising |= rates[-1] > rates[-2] * 1.3
+        return cyclical, rising
+
+
+# Below this many draws the parallel position histogram costs more in
+# thread start-up than it saves
+PARALLEL_MIN_ROWS = 5000
+
+
+def _position_histogram_numpy(sorted_arr, offset, counts, first_seen):
+    order = np.arange(offset, offset + sorted_arr.shape[0])
+    for pos in range(sorted_arr.shape[1]):
+        counts[pos] += np.bincount(sorted_arr[:, pos], minlength=counts.shape[1])
+        np.minimum.at(first_seen[pos], sorted_arr[:, pos], order)
+
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _position_histogram_parallel(sorted_arr, offset, counts, first_seen):
+        n = sorted_arr.shape[0]
+        for pos in prange(sorted_arr.shape[1]):
+            for i in range(n):
+                v = sorted_arr[i, pos]
+                counts[pos, v] += 1
+                if first_seen[pos, v] > offset + i:
+                    first_seen[pos, v] = offset + i
+
+
+def position_histogram(sorted_arr, offset, counts, first_seen):
+    """
+    Add row-sorted draws to per-position counts and first-seen indices.
+
+    counts and first_seen are (positions, max number + 1) arrays updated in
+    place; row i is recorded as draw index offset + i. Large batches are
+    split across cores by position when numba is installed.
+    """
+    if njit is not None and sorted_arr.shape[0] >= PARALLEL_MIN_ROWS:
+        _position_histogram_parallel(sorted_arr, offset, counts, first_seen)
+    else:
+        _position_histogram_numpy(sorted_arr, offset, counts, first_seen)
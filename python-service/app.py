@@ -7,16 +7,51 @@ Flask API wrapper around EnhancedLottoOracle
 import os
 import json
 import sys
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from typing import List, Dict, Any
 import warnings
+import hashlib
+import logging
+import threading
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from datetime import date
 import numpy as np
 
 warnings.filterwarnings('ignore')
 
+# Per-request debug output is only formatted when LOG_LEVEL=DEBUG
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper())
+log = logging.getLogger('lotto')
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to Flask's jsonify
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:  # Optional: fall back to hashlib
+    xxhash = None
+
+try:
+    from flask_caching import Cache
+except ImportError:  # Optional: /analyze recomputes on every request
+    Cache = None
+
+try:
+    import fastjsonschema
+except ImportError:  # Optional: only the hand-written checks run
+    fastjsonschema = None
+
 # Import the oracle system
 from lottOracleV2 import EnhancedLottoOracle
+from _kernels import prediction_features
 
 
 def make_json_serializable(obj: Any) -> Any:
@@ -46,48 +81,294 @@ def make_json_serializable(obj: Any) -> Any:
             pass
         return obj
 
+
+def _orjson_default(obj: Any) -> Any:
+    """orjson fallback for the few types it can't serialize natively (e.g. non-contiguous arrays)"""
+    converted = make_json_serializable(obj)
+    if converted is obj:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return converted
+
+
+def _json_response(data: Dict[str, Any], status: int = 200) -> Response:
+    """Serialize a response payload in one pass, numpy types included"""
+    if orjson is None:
+        response = jsonify(make_json_serializable(data))
+        response.status_code = status
+        return response
+    body = orjson.dumps(
+        data,
+        default=_orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+    return Response(body, status=status, mimetype='application/json')
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, so every jsonify() call uses it"""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(
+            obj,
+            default=_orjson_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json (NaN/Infinity, integers over 64 bits)
+            return super().loads(s, **kwargs)
+
+# Request shapes. Individual draws are still filtered (not rejected) by _validate_draws.
+PREDICT_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'draws': {'type': 'array', 'minItems': 1},
+        'machine_draws': {'type': ['array', 'null']},
+        'draw_dates': {'type': ['array', 'null']},
+        'lotto_types': {'type': ['array', 'null']},
+        'strategy': {'type': 'string'},
+        'n_predictions': {'type': 'integer', 'minimum': 1},
+        'winning_predictions': {'type': ['array', 'null']},
+        'current_lotto_type': {'type': ['string', 'null']}
+    },
+    'required': ['draws']
+}
+
+ANALYZE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'draws': {'type': 'array'}
+    },
+    'required': ['draws']
+}
+
+if fastjsonschema is not None:
+    _validate_predict_request = fastjsonschema.compile(PREDICT_SCHEMA)
+    _validate_analyze_request = fastjsonschema.compile(ANALYZE_SCHEMA)
+else:
+    _validate_predict_request = _validate_analyze_request = None
+
+
+def _schema_error(validator, data: Any):
+    """Run a compiled schema validator; return a 400 response on failure, else None"""
+    if validator is None:
+        return None
+    try:
+        validator(data)
+    except fastjsonschema.JsonSchemaException as e:
+        return jsonify({'error': 'Invalid request', 'message': e.message}), 400
+    return None
+
+
+def _validate_draws(draws: List[Any], low: int, high: int) -> np.ndarray:
+    """Return the rows of exactly 5 integers in [low, high] as an (n, 5) int16 array"""
+    try:
+        arr = np.asarray(draws)
+    except (ValueError, TypeError):
+        arr = None  # Ragged rows
+    
+    if arr is None or arr.ndim != 2 or arr.shape[1] != 5 or arr.dtype.kind not in 'iu':
+        # Malformed payload: keep only rows of 5 in-range integers, then vectorize
+        rows = [d for d in draws
+                if isinstance(d, list) and len(d) == 5
+                and all(isinstance(n, int) and low <= n <= high for n in d)]
+        arr = np.asarray(rows, dtype=np.int64).reshape(-1, 5)
+    
+    in_range = ((arr >= low) & (arr <= high)).all(axis=1)
+    return arr[in_range].astype(np.int16)
+
+
+def _normalize_machine_draws(machine_draws: List[Any], n: int):
+    """Pad/truncate machine draws to an (n, 5) int16 array.
+    
+    Short rows are zero-padded, long rows truncated to 5, and rows that are
+    not lists or hold non-integers / values outside 0-90 become all zeros.
+    Returns the array and the number of rows that had to be fixed.
+    """
+    out = np.zeros((n, 5), dtype=np.int16)
+    rows = machine_draws[:n]
+    try:
+        arr = np.asarray(rows)
+    except (ValueError, TypeError):
+        arr = None  # Ragged rows
+    
+    if arr is not None and arr.ndim == 2 and arr.shape[1] == 5 and arr.dtype.kind in 'iu':
+        # Well-formed payload: one vectorized range check
+        bad = ((arr < 0) | (arr > 90)).any(axis=1)
+        out[:len(arr)] = np.where(bad[:, None], 0, arr)
+        return out, int(bad.sum())
+    
+    n_fixed = 0
+    for i, row in enumerate(rows):
+        if (isinstance(row, list) and row
+                and all(isinstance(x, int) and 0 <= x <= 90 for x in row[:5])):
+            out[i, :min(5, len(row))] = row[:5]
+            n_fixed += len(row) != 5
+        else:
+            n_fixed += 1
+    return out, n_fixed
+
+
+def _freq_top5(draw_arr: np.ndarray) -> List[int]:
+    """The 5 most frequent numbers (1-90) in a draw array, sorted"""
+    counts = np.bincount(draw_arr.ravel(), minlength=91)
+    top = np.argpartition(counts[1:], -5)[-5:] + 1
+    return sorted(top.tolist())
+
+
+def _hash_bytes(data: bytes) -> int:
+    """64-bit content hash used for oracle cache keys"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+# Rolling hash over the last history seen: histories usually grow by appending the
+# latest draw, so only the new rows need hashing
+_draws_hasher = None
+_hashed_draws = b''
+_draws_hash_lock = threading.Lock()
+
+
+def _draws_cache_key(draw_arr: np.ndarray) -> Any:
+    """Order-insensitive (within each draw) key for a validated draw array"""
+    global _draws_hasher, _hashed_draws
+    sorted_bytes = np.sort(draw_arr, axis=1).tobytes()
+    if xxhash is None:
+        # The row-sorted bytes are an exact key on their own; comparing them is one memcmp
+        return sorted_bytes
+    
+    with _draws_hash_lock:
+        if _draws_hasher is not None and sorted_bytes.startswith(_hashed_draws):
+            # Same history plus appended draws: extend the previous hash
+            _draws_hasher.update(memoryview(sorted_bytes)[len(_hashed_draws):])
+        else:
+            _draws_hasher = xxhash.xxh3_64(sorted_bytes)
+        _hashed_draws = sorted_bytes
+        return _draws_hasher.intdigest()
+
+
+def _dates_cache_key(draw_dates: List[str]) -> Any:
+    """Hash of the draw dates the oracle was built with (None if no dates)"""
+    if not draw_dates:
+        return None
+    return _hash_bytes('\n'.join(map(str, draw_dates)).encode())
+
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests from Node.js backend
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
+ANALYZE_CACHE_TIMEOUT = 300  # Seconds to reuse /analyze results for identical draws
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'}) if Cache is not None else None
 
 # Global oracle instance (initialized on first request)
 oracle_instance = None
-historical_draws_cache = None
-draw_dates_cache = None  # Cache for draw dates (for yearly analysis)
-oracle_initializing = False  # Lock to prevent concurrent initialization
+historical_draws_cache = None  # Key of the draws the oracle was built with
+draw_dates_cache = None  # Hash of the draw dates (for yearly analysis)
+_oracle_lock = threading.Lock()  # Only one request builds the oracle at a time
+oracle_generation = 0  # Bumped on every (re)initialization
+
+# Serialized /predict responses, keyed on oracle generation + request parameters.
+# Predictions are deterministic for a given oracle, so repeat requests can skip it.
+PREDICTION_CACHE_SIZE = 64
+# Strategies whose output also depends on today's date (transfer predicts for
+# the current month and day; check_balance may recommend transfer), so their
+# cached responses are only reused on the same day
+DATE_DEPENDENT_STRATEGIES = ('transfer', 'check_balance')
+_prediction_cache: 'OrderedDict[tuple, bytes]' = OrderedDict()
+_prediction_cache_lock = threading.Lock()
+
+# Oracle construction (model fitting) runs in a separate process so this one keeps
+# serving /health and cached requests. Set ORACLE_INIT_PROCESS=0 to build in-process.
+ORACLE_INIT_PROCESS = os.environ.get('ORACLE_INIT_PROCESS', '1') != '0'
+# Seconds; keep below gunicorn's --timeout (Procfile) so a stuck build is
+# abandoned before the worker itself is killed
+ORACLE_INIT_TIMEOUT = int(os.environ.get('ORACLE_INIT_TIMEOUT', 100))
+_oracle_pool = None
+_oracle_pool_lock = threading.Lock()  # Guards creating / dropping _oracle_pool only
+
+
+def _get_oracle_pool() -> ProcessPoolExecutor:
+    """The oracle build pool, started on first use"""
+    global _oracle_pool
+    with _oracle_pool_lock:
+        if _oracle_pool is None:
+            # spawn: forking a process that already runs request threads is unsafe
+            _oracle_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return _oracle_pool
 
 
-def initialize_oracle(draws: List[List[int]], draw_dates: List[str] = None, lotto_types: List[str] = None) -> EnhancedLottoOracle:
+def _drop_oracle_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget pool (unless it was already replaced) so the next build starts a new one"""
+    global _oracle_pool
+    with _oracle_pool_lock:
+        if _oracle_pool is pool:
+            _oracle_pool = None
+
+
+def _kill_oracle_pool(pool: ProcessPoolExecutor) -> None:
+    """Stop pool and its worker process, abandoning any build in progress"""
+    _drop_oracle_pool(pool)
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def _build_oracle(draws: List[List[int]], draw_dates: List[str] = None,
+                  lotto_types: List[str] = None) -> EnhancedLottoOracle:
+    """Build an oracle in the pool process, falling back to this one if the pool is unusable"""
+    if not ORACLE_INIT_PROCESS:
+        return EnhancedLottoOracle(draws, draw_dates, lotto_types)
+    
+    pool = None
+    try:
+        pool = _get_oracle_pool()
+        future = pool.submit(EnhancedLottoOracle, draws, draw_dates, lotto_types)
+        return future.result(timeout=ORACLE_INIT_TIMEOUT)
+    except FutureTimeoutError:
+        # The single worker would stay busy with this build and every later
+        # one would queue behind it, so kill it and start fresh next time
+        _kill_oracle_pool(pool)
+        raise RuntimeError(f"Oracle initialization timed out after {ORACLE_INIT_TIMEOUT}s")
+    except (BrokenProcessPool, pickle.PicklingError, OSError) as e:
+        print(f"Warning: Oracle process pool unavailable ({e}). Building in-process.")
+        _drop_oracle_pool(pool)
+        return EnhancedLottoOracle(draws, draw_dates, lotto_types)
+
+
+def initialize_oracle(draws: List[List[int]], draw_dates: List[str] = None, lotto_types: List[str] = None,
+                      draws_key: Any = None) -> EnhancedLottoOracle:
     """Initialize or reinitialize the oracle with new data"""
-    global oracle_instance, oracle_initializing, draw_dates_cache
+    global oracle_instance, historical_draws_cache, draw_dates_cache, oracle_generation
     
-    # Prevent concurrent initialization
-    if oracle_initializing:
-        print("WARNING: Oracle is already initializing, waiting...")
-        import time
-        max_wait = 60  # Wait up to 60 seconds
-        waited = 0
-        while oracle_initializing and waited < max_wait:
-            time.sleep(1)
-            waited += 1
-        if oracle_instance is not None:
+    dates_key = _dates_cache_key(draw_dates)
+    with _oracle_lock:
+        # Another request may have built the same oracle while we waited for the lock
+        if (oracle_instance is not None and draws_key is not None
+                and historical_draws_cache == draws_key
+                and (not draw_dates or draw_dates_cache == dates_key)):
             return oracle_instance
-    
-    try:
-        oracle_initializing = True
-        print(f"Initializing oracle with {len(draws)} draws...")
-        draw_dates_cache = draw_dates
-        oracle_instance = EnhancedLottoOracle(draws, draw_dates, lotto_types)
-        print(f"Oracle initialized successfully")
-        return oracle_instance
-    except Exception as e:
-        print(f"ERROR initializing oracle: {e}")
-        import traceback
-        traceback.print_exc()
-        # Don't leave oracle_instance as None - try to create a minimal instance
-        oracle_instance = None
-        raise
-    finally:
-        oracle_initializing = False
+        
+        try:
+            print(f"Initializing oracle with {len(draws)} draws...")
+            oracle_instance = _build_oracle(draws, draw_dates, lotto_types)
+            historical_draws_cache = draws_key
+            draw_dates_cache = dates_key
+            oracle_generation += 1
+            print(f"Oracle initialized successfully")
+            return oracle_instance
+        except Exception as e:
+            print(f"ERROR initializing oracle: {e}")
+            import traceback
+            traceback.print_exc()
+            oracle_instance = None
+            historical_draws_cache = None
+            raise
 
 
 @app.route('/health', methods=['GET'])
@@ -119,6 +400,10 @@ def predict():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        invalid = _schema_error(_validate_predict_request, data)
+        if invalid:
+            return invalid
+        
         draws = data.get('draws', [])
         machine_draws = data.get('machine_draws', [])
         draw_dates = data.get('draw_dates', [])  # Draw dates for yearly analysis
@@ -136,119 +421,73 @@ def predict():
             return jsonify({'error': 'Invalid draws format. Expected list of lists'}), 400
         
         # Validate and normalize winning draws first - ensure all are exactly 5 numbers
-        valid_draws = []
-        for i, win_draw in enumerate(draws):
-            if not win_draw or not isinstance(win_draw, list):
-                print(f"Warning: Draw {i} has invalid winning numbers (not a list). Skipping.")
-                continue
-            if len(win_draw) != 5:
-                print(f"Warning: Draw {i} has {len(win_draw)} winning numbers (expected 5). Skipping.")
-                continue
-            if not all(isinstance(n, int) and 1 <= n <= 90 for n in win_draw):
-                print(f"Warning: Draw {i} has winning numbers out of range. Skipping.")
-                continue
-            valid_draws.append(win_draw)
+        draw_arr = _validate_draws(draws, 1, 90)
+        if len(draw_arr) < len(draws):
+            print(f"Warning: Skipped {len(draws) - len(draw_arr)} draw(s) with invalid winning numbers (expected 5 numbers in 1-90).")
         
-        if len(valid_draws) < 50:
-            return jsonify({'error': f'Insufficient valid draws. Need at least 50, got {len(valid_draws)}'}), 400
+        if len(draw_arr) < 50:
+            return jsonify({'error': f'Insufficient valid draws. Need at least 50, got {len(draw_arr)}'}), 400
         
-        draws = valid_draws
+        draws = draw_arr.tolist()
         
         # Handle machine draws - fill missing with zeros or use winning numbers
         # Don't throw errors, just normalize the data
-        if not machine_draws or len(machine_draws) == 0:
-            # No machine draws provided - fill with zeros (exactly 5 zeros per draw)
-            machine_draws = [[0, 0, 0, 0, 0] for _ in draws]
+        if not machine_draws or not isinstance(machine_draws, list):
             print(f"Warning: No machine_draws provided. Filling with zeros for {len(draws)} draws.")
-        elif len(machine_draws) != len(draws):
-            # Length mismatch - pad or truncate to match draws length
-            if len(machine_draws) < len(draws):
-                # Pad with zeros for missing entries (exactly 5 zeros per entry)
-                missing_count = len(draws) - len(machine_draws)
-                machine_draws.extend([[0, 0, 0, 0, 0] for _ in range(missing_count)])
-                print(f"Warning: machine_draws length ({len(machine_draws) - missing_count}) < draws length ({len(draws)}). Padded {missing_count} entries with zeros.")
-            else:
-                # Truncate to match draws length
-                machine_draws = machine_draws[:len(draws)]
-                print(f"Warning: machine_draws length ({len(machine_draws)}) > draws length ({len(draws)}). Truncated to match.")
-        
-        # Normalize each machine draw - ensure exactly 5 numbers per draw
-        normalized_machine_draws = []
-        for i, mach_draw in enumerate(machine_draws):
-            if not mach_draw or not isinstance(mach_draw, list):
-                # Invalid machine draw - use zeros (exactly 5 zeros)
-                normalized_machine_draws.append([0, 0, 0, 0, 0])
-                print(f"Warning: Draw {i} has invalid machine numbers (not a list). Using zeros.")
-            elif len(mach_draw) != 5:
-                # Wrong length - normalize to exactly 5
-                if len(mach_draw) > 5:
-                    print(f"Warning: Draw {i} has {len(mach_draw)} machine numbers, truncating to 5.")
-                    normalized_machine_draws.append(mach_draw[:5])
-                else:  # len(mach_draw) < 5
-                    print(f"Warning: Draw {i} has {len(mach_draw)} machine numbers, padding with zeros to 5.")
-                    normalized = mach_draw + [0] * (5 - len(mach_draw))
-                    normalized_machine_draws.append(normalized)
-            elif not all(isinstance(n, int) and 0 <= n <= 90 for n in mach_draw):
-                # Some numbers out of range - use zeros (exactly 5 zeros)
-                normalized_machine_draws.append([0, 0, 0, 0, 0])
-                print(f"Warning: Draw {i} has machine numbers out of range. Using zeros.")
-            else:
-                # Valid machine draw - already exactly 5 numbers
-                normalized_machine_draws.append(mach_draw)
-        
-        # Final validation: ensure all normalized machine draws are exactly 5 numbers
-        for i, mach_draw in enumerate(normalized_machine_draws):
-            if len(mach_draw) != 5:
-                print(f"ERROR: Normalized machine draw {i} has {len(mach_draw)} numbers! This should never happen. Fixing...")
-                if len(mach_draw) > 5:
-                    normalized_machine_draws[i] = mach_draw[:5]
-                else:
-                    normalized_machine_draws[i] = mach_draw + [0] * (5 - len(mach_draw))
+            machine_draws = []
+        elif len(machine_draws) < len(draws):
+            print(f"Warning: machine_draws length ({len(machine_draws)}) < draws length ({len(draws)}). Padded {len(draws) - len(machine_draws)} entries with zeros.")
+        elif len(machine_draws) > len(draws):
+            print(f"Warning: machine_draws length ({len(machine_draws)}) > draws length ({len(draws)}). Truncated to match.")
         
-        machine_draws = normalized_machine_draws
+        # Normalize to exactly 5 numbers per draw (invalid entries become zeros)
+        machine_arr, n_fixed = _normalize_machine_draws(machine_draws, len(draws))
+        if n_fixed:
+            print(f"Warning: Normalized {n_fixed} machine draw(s) that were not 5 numbers in range 0-90.")
         
         # Filter machine numbers for strategies that need them (intelligence and ensemble)
         # Do this BEFORE checking minimum requirements, as filtering may reduce the count
         # For ensemble, we filter so intelligence can work; for intelligence, we require it
-        if strategy in ['intelligence', 'ensemble'] and machine_draws:
-            # Filter to only include draws with valid machine numbers (length == 5)
-            filtered_draws = []
-            filtered_machines = []
-            for i, (win_draw, mach_draw) in enumerate(zip(draws, machine_draws)):
-                # Check if machine draw is valid (not all zeros, length 5, all numbers in range 1-90)
-                if mach_draw and len(mach_draw) == 5 and all(isinstance(n, int) and 1 <= n <= 90 for n in mach_draw) and not all(n == 0 for n in mach_draw):
-                    filtered_draws.append(win_draw)
-                    filtered_machines.append(mach_draw)
+        if strategy in ['intelligence', 'ensemble'] and len(machine_arr):
+            # Keep only draws whose machine numbers are all in range 1-90 (rows are already
+            # normalized to 5 numbers in 0-90, so this also drops zero-filled rows)
+            machine_ok = (machine_arr >= 1).all(axis=1)
+            n_valid = int(machine_ok.sum())
             
             if strategy == 'intelligence':
                 # Intelligence requires at least 50 valid draws
-                if len(filtered_draws) < 50:
+                if n_valid < 50:
                     return jsonify({
                         'error': 'Insufficient data',
-                        'message': f'Need at least 50 draws with valid machine numbers. Found {len(filtered_draws)} valid draws out of {len(draws)} total.',
-                        'valid_draws': len(filtered_draws),
+                        'message': f'Need at least 50 draws with valid machine numbers. Found {n_valid} valid draws out of {len(draws)} total.',
+                        'valid_draws': n_valid,
                         'total_draws': len(draws)
                     }), 400
             elif strategy == 'ensemble':
                 # Ensemble can work with fewer, but log if we filtered
-                if len(filtered_draws) < len(draws):
-                    print(f"Ensemble strategy: Filtered to {len(filtered_draws)} draws with valid machine numbers (from {original_draw_count} total) for intelligence engine")
+                if n_valid < len(draws):
+                    print(f"Ensemble strategy: Filtered to {n_valid} draws with valid machine numbers (from {original_draw_count} total) for intelligence engine")
             
             # Use filtered data for intelligence/ensemble
-            if len(filtered_draws) > 0:
-                draws = filtered_draws
-                machine_draws = filtered_machines
+            if n_valid > 0:
+                if n_valid < len(draws):
+                    draw_arr = draw_arr[machine_ok]
+                    machine_arr = machine_arr[machine_ok]
+                    draws = draw_arr.tolist()
             else:
                 # No valid machine numbers - set to empty so intelligence won't be used
-                machine_draws = []
+                machine_arr = machine_arr[:0]
                 print(f"Warning: No draws with valid machine numbers. Intelligence engine will be skipped.")
         
-        elif strategy == 'intelligence' and not machine_draws:
+        elif strategy == 'intelligence' and not len(machine_arr):
             return jsonify({
                 'error': 'Machine numbers required',
                 'message': 'Intelligence strategy requires machine_draws in request body'
             }), 400
         
+        # Machine draws are converted to lists once, after any filtering
+        machine_draws = machine_arr.tolist()
+        
         # Check minimum data requirement AFTER filtering (if filtering occurred)
         min_required = 60 if strategy not in ['intelligence', 'ensemble'] else 50
         if len(draws) < min_required:
@@ -259,18 +498,17 @@ def predict():
             }), 400
         
         # Initialize or update oracle if data changed
-        global historical_draws_cache, oracle_instance, draw_dates_cache
-        # Use a more robust comparison (convert to tuples for comparison)
-        draws_tuple = tuple(tuple(sorted(d)) for d in draws)
-        dates_changed = draw_dates and draw_dates_cache != draw_dates
-        if historical_draws_cache != draws_tuple or oracle_instance is None or (strategy == 'yearly' and dates_changed):
-            historical_draws_cache = draws_tuple
+        # Compare content hashes instead of the full draw/date lists (no lock on the hot path)
+        draws_key = _draws_cache_key(draw_arr)
+        dates_changed = draw_dates and draw_dates_cache != _dates_cache_key(draw_dates)
+        if historical_draws_cache != draws_key or oracle_instance is None or (strategy == 'yearly' and dates_changed):
             try:
                 # Pass draw_dates and lotto_types for yearly, transfer, and check_balance strategies
                 initialize_oracle(
                     draws, 
                     draw_dates if strategy in ['yearly', 'transfer', 'check_balance'] else None,
-                    lotto_types if strategy in ['yearly', 'transfer', 'check_balance'] else None
+                    lotto_types if strategy in ['yearly', 'transfer', 'check_balance'] else None,
+                    draws_key=draws_key
                 )
             except Exception as e:
                 print(f"ERROR: Failed to initialize oracle: {e}")
@@ -286,6 +524,21 @@ def predict():
                 'message': 'The prediction oracle is not available. Please try again.'
             }), 500
         
+        # Serve repeat requests against the same oracle from the prediction cache
+        prediction_key = (
+            oracle_generation, strategy, n_predictions,
+            _hash_bytes(machine_arr.tobytes()) if machine_draws else 0,
+            _hash_bytes(json.dumps([winning_predictions, current_lotto_type], default=str).encode())
+            if strategy == 'check_balance' else 0,
+            date.today() if strategy in DATE_DEPENDENT_STRATEGIES else None
+        )
+        with _prediction_cache_lock:
+            cached_body = _prediction_cache.get(prediction_key)
+            if cached_body is not None:
+                _prediction_cache.move_to_end(prediction_key)
+        if cached_body is not None:
+            return Response(cached_body, mimetype='application/json')
+        
         # Special handling for check_balance strategy
         if strategy == 'check_balance':
             print("Check-and-balance strategy: Analyzing past winning predictions...")
@@ -341,7 +594,8 @@ def predict():
                 }), 500
         else:
             # Generate predictions (now deterministic based on data + strategy)
-            print(f"DEBUG: About to call generate_predictions with strategy={strategy}, draws={len(draws)}, machine_draws={'present' if machine_draws else 'None'} ({len(machine_draws) if machine_draws else 0} entries)")
+            log.debug("About to call generate_predictions with strategy=%s, draws=%d, machine_draws=%d entries",
+                      strategy, len(draws), len(machine_draws) if machine_draws else 0)
             try:
                 predictions = oracle_instance.generate_predictions(
                     strategy=strategy,
@@ -357,12 +611,7 @@ def predict():
                     'message': str(e)
                 }), 500
         
-        print(f"DEBUG: generate_predictions returned: {predictions}")
-        print(f"DEBUG: predictions.keys() = {list(predictions.keys())}")
-        if 'intelligence' in predictions:
-            print(f"DEBUG: intelligence in predictions: {predictions['intelligence']}")
-        else:
-            print(f"DEBUG: intelligence NOT in predictions")
+        log.debug("generate_predictions returned: %s", predictions)
         
         # Convert predictions to JSON-serializable format
         result = {}
@@ -376,12 +625,7 @@ def predict():
                 print(f"  predictions.keys() = {list(predictions.keys()) if predictions else 'N/A'}")
                 # Provide immediate fallback
                 try:
-                    from collections import Counter
-                    all_numbers = []
-                    for draw in draws:
-                        all_numbers.extend(draw)
-                    freq = Counter(all_numbers)
-                    top_5_fallback = sorted([n for n, _ in freq.most_common(5)])
+                    top_5_fallback = _freq_top5(draw_arr)
                     print(f"  Providing immediate fallback: {top_5_fallback}")
                     predictions[strategy] = [top_5_fallback]
                 except Exception as e:
@@ -398,7 +642,7 @@ def predict():
                 if preds and len(preds) > 0 and isinstance(preds[0], list):
                     # These are special features - just store the numbers
                     result[method] = {
-                        'numbers': make_json_serializable(preds[0]),
+                        'numbers': preds[0],
                         'count': len(preds[0]),
                         'type': 'two_sure' if method == 'two_sure' else 'three_direct'
                     }
@@ -411,12 +655,7 @@ def predict():
                     print(f"  This is a critical error - {method} strategy must return predictions")
                     # Provide a fallback prediction based on frequency
                     try:
-                        from collections import Counter
-                        all_numbers = []
-                        for draw in draws:
-                            all_numbers.extend(draw)
-                        freq = Counter(all_numbers)
-                        top_5_fallback = sorted([n for n, _ in freq.most_common(5)])
+                        top_5_fallback = _freq_top5(draw_arr)
                         print(f"  Using frequency-based fallback: {top_5_fallback}")
                         preds = [top_5_fallback]  # Replace empty with fallback
                     except Exception as e:
@@ -427,7 +666,7 @@ def predict():
                     print(f"Warning: {method} strategy returned no predictions (preds: {preds})")
                     continue
             
-            result[method] = []
+            valid_preds = []
             for pred in preds:
                 # Handle None values
                 if pred is None:
@@ -444,30 +683,26 @@ def predict():
                 if not all(isinstance(n, (int, float)) and 1 <= n <= 90 for n in pred):
                     print(f"Warning: {method} returned prediction with invalid numbers: {pred}")
                     continue
-                result[method].append({
-                    'numbers': make_json_serializable(pred),
-                    'sum': int(sum(pred)),
-                    'evens': int(sum(1 for n in pred if n % 2 == 0)),
-                    'highs': int(sum(1 for n in pred if n > 45))
-                })
+                valid_preds.append(pred)
+            
+            # Sum/evens/highs for all of this method's predictions in one kernel call
+            feats = prediction_features(np.asarray(valid_preds, dtype=np.int16).reshape(-1, 5)).tolist()
+            result[method] = [
+                {'numbers': pred, 'sum': f[0], 'evens': f[1], 'highs': f[2]}
+                for pred, f in zip(valid_preds, feats)
+            ]
         
         # Debug: Log what we're returning
-        print(f"Returning predictions with methods: {list(result.keys())}")
-        for method, preds in result.items():
-            # Handle two_sure and three_direct which are stored as dicts, not lists
-            if method in ['two_sure', 'three_direct']:
-                print(f"  {method}: {preds.get('numbers', 'N/A')}")
-            elif isinstance(preds, list):
-                print(f"  {method}: {len(preds)} prediction(s)")
-                if preds and len(preds) > 0 and isinstance(preds[0], dict):
-                    print(f"    First prediction: {preds[0].get('numbers', 'N/A')}")
-        
-        # Also log what was in the original predictions dict
-        print(f"Original predictions dict keys: {list(predictions.keys())}")
-        if 'intelligence' in predictions:
-            print(f"  intelligence in predictions: {predictions['intelligence']}")
-        else:
-            print(f"  intelligence NOT in predictions dict")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Returning predictions with methods: %s", list(result.keys()))
+            for method, preds in result.items():
+                # Handle two_sure and three_direct which are stored as dicts, not lists
+                if method in ['two_sure', 'three_direct']:
+                    log.debug("  %s: %s", method, preds.get('numbers', 'N/A'))
+                elif isinstance(preds, list):
+                    log.debug("  %s: %d prediction(s)", method, len(preds))
+                    if preds and isinstance(preds[0], dict):
+                        log.debug("    First prediction: %s", preds[0].get('numbers', 'N/A'))
         
         # Ensure we have at least one prediction method
         if not result:
@@ -481,13 +716,11 @@ def predict():
         regime_info = None
         if oracle_instance.regime_history:
             regime_info = oracle_instance.regime_history[-1]
-            # Convert all values to JSON-serializable types
-            regime_info = make_json_serializable(regime_info)
         
         # Extract confidence scores from predictions (stored under _confidence key)
         confidence_info = None
         if '_confidence' in predictions:
-            confidence_info = make_json_serializable(predictions['_confidence'])
+            confidence_info = predictions['_confidence']
             # Remove from result dict (already extracted)
             if '_confidence' in result:
                 del result['_confidence']
@@ -501,10 +734,10 @@ def predict():
                 'accelerating': oracle_instance._trend_data.get('accelerating', [])[:5]
             }
         
-        # Ensure all values in response are JSON-serializable
+        # numpy values are serialized directly by _json_response
         response_data = {
             'success': True,
-            'predictions': make_json_serializable(result),
+            'predictions': result,
             'strategy': str(strategy),
             'regime_change': regime_info,
             'confidence': confidence_info,
@@ -512,7 +745,12 @@ def predict():
             'data_points_used': int(len(draws))
         }
         
-        return jsonify(response_data)
+        response = _json_response(response_data)
+        with _prediction_cache_lock:
+            _prediction_cache[prediction_key] = response.get_data()
+            if len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+                _prediction_cache.popitem(last=False)
+        return response
         
     except Exception as e:
         return jsonify({
@@ -521,6 +759,35 @@ def predict():
         }), 500
 
 
+def _analyze_draws(draws: List[List[int]], draws_key: Any) -> Dict[str, Any]:
+    """Pattern analysis and regime detection behind /analyze"""
+    # Initialize oracle
+    if historical_draws_cache != draws_key or oracle_instance is None:
+        initialize_oracle(draws, draws_key=draws_key)
+    
+    # Get pattern analysis
+    recent = draws[-50:] if len(draws) >= 50 else draws
+    patterns = oracle_instance._analyze_patterns(recent)
+    
+    # Get regime change detection
+    regime = oracle_instance.pattern_detector.detect_regime_change(draws[-100:]) if len(draws) >= 100 else None
+    
+    return {
+        'success': True,
+        'patterns': {
+            'sum_mean': float(patterns.get('sum_mean', 0)),
+            'sum_std': float(patterns.get('sum_std', 0)),
+            'sum_range': patterns.get('sum_range', [0, 0]),
+            'even_mode': int(patterns.get('even_mode', 0)),
+            'high_mode': int(patterns.get('high_mode', 0)),
+            'hot_numbers': patterns.get('hot_numbers', []),
+            'cold_numbers': patterns.get('cold_numbers', [])
+        },
+        'regime_change': regime if regime else None,
+        'data_points_used': len(draws)
+    }
+
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """
@@ -533,6 +800,10 @@ def analyze():
     """
     try:
         data = request.get_json()
+        invalid = _schema_error(_validate_analyze_request, data)
+        if invalid:
+            return invalid
+        
         draws = data.get('draws', [])
         
         if not draws or len(draws) < 50:
@@ -541,36 +812,23 @@ def analyze():
                 'minimum_required': 50
             }), 400
         
-        # Initialize oracle
-        global historical_draws_cache
-        if historical_draws_cache != draws:
-            historical_draws_cache = draws
-            initialize_oracle(draws)
-        
-        # Get pattern analysis
-        recent = draws[-50:] if len(draws) >= 50 else draws
-        patterns = oracle_instance._analyze_patterns(recent)
-        
-        # Get regime change detection
-        regime = oracle_instance.pattern_detector.detect_regime_change(draws[-100:]) if len(draws) >= 100 else None
+        # Rows that aren't 5 numbers in 1-90 are skipped, as in /predict
+        draw_arr = _validate_draws(draws, 1, 90)
+        if len(draw_arr) < 50:
+            return jsonify({
+                'error': 'Insufficient data',
+                'minimum_required': 50
+            }), 400
         
-        # Convert patterns to JSON-serializable
-        patterns_serializable = make_json_serializable(patterns)
+        # Hot-number ties follow in-draw order, so key the result on the unsorted draws
+        cache_key = f'analyze:{_hash_bytes(draw_arr.tobytes())}'
+        result = cache.get(cache_key) if cache is not None else None
+        if result is None:
+            result = _analyze_draws(draw_arr.tolist(), _draws_cache_key(draw_arr))
+            if cache is not None:
+                cache.set(cache_key, result, timeout=ANALYZE_CACHE_TIMEOUT)
         
-        return jsonify({
-            'success': True,
-            'patterns': {
-                'sum_mean': float(patterns.get('sum_mean', 0)),
-                'sum_std': float(patterns.get('sum_std', 0)),
-                'sum_range': patterns.get('sum_range', [0, 0]),
-                'even_mode': int(patterns.get('even_mode', 0)),
-                'high_mode': int(patterns.get('high_mode', 0)),
-                'hot_numbers': patterns.get('hot_numbers', []),
-                'cold_numbers': patterns.get('cold_numbers', [])
-            },
-            'regime_change': make_json_serializable(regime) if regime else None,
-            'data_points_used': len(draws)
-        })
+        return _json_response(result)
         
     except Exception as e:
         return jsonify({
@@ -579,6 +837,30 @@ def analyze():
         }), 500
 
 
+def _warmup() -> None:
+    """Pay first-call costs (pool process start-up, imports, kernel JIT) before the first request"""
+    try:
+        rng = np.random.default_rng(0)
+        draws = np.sort(np.array([rng.choice(90, 5, replace=False) + 1 for _ in range(50)]), axis=1)
+        prediction_features(draws.astype(np.int16))
+        # Throwaway oracle: not under _oracle_lock, so a real first request
+        # never waits on it
+        _build_oracle(draws.tolist())
+    except Exception as e:
+        print(f"Warning: Warmup failed: {e}")
+
+
+def start_warmup() -> None:
+    """Run _warmup in a background thread (ORACLE_WARMUP=0 disables it).
+    
+    Called from the __main__ block and gunicorn's post_worker_init hook
+    (gunicorn.conf.py) rather than on import, so importing this module
+    never starts the spawn pool.
+    """
+    if os.environ.get('ORACLE_WARMUP', '1') != '0':
+        threading.Thread(target=_warmup, name='oracle-warmup', daemon=True).start()
+
+
 if __name__ == '__main__':
     # Use port 5001 by default to avoid conflict with backend (port 5000)
     port = int(os.environ.get('PORT', 5001))
@@ -587,5 +869,6 @@ if __name__ == '__main__':
     print(f"Starting Lotto Oracle Service on port {port}")
     print(f"Debug mode: {debug}")
     
+    start_warmup()
     app.run(host='0.0.0.0', port=port, debug=debug)
 
@@ -0,0 +1,7 @@
+"""Gunicorn settings (loaded automatically from the working directory)"""
+
+
+def post_worker_init(worker):
+    """Warm each worker's oracle pool and kernels once its app is loaded"""
+    from app import start_warmup
+    start_warmup()
@@ -1,13 +1,22 @@
+import os
+import glob
 import numpy as np
-import pandas as pd
 from typing import List, Dict, Tuple
-from collections import Counter, deque
+from collections import Counter
+import heapq
 import random
 import hashlib
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from datetime import datetime
+import joblib
+import sklearn
+from sklearn.ensemble import (RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier,
+                              VotingClassifier)
 from sklearn.preprocessing import StandardScaler
 import warnings
 
+from _kernels import (number_samples, population_fitness, position_histogram, rate_patterns, score_gaps,
+                      score_positions)
+
 warnings.filterwarnings('ignore')
 
 
@@ -15,6 +24,133 @@ warnings.filterwarnings('ignore')
 # ENHANCED LOTTO ORACLE 2.0 - "PATTERN PROBE"
 # ============================================================================
 
+# Zone index (0-8) of every number 1-90; index 0 is unused
+ZONE_OF = tuple((n - 1) // 10 for n in range(91))
+
+# Per-number tables for vectorized code, indexed by number - 1
+NUMBERS = np.arange(1, 91)
+PARITY = NUMBERS % 2
+HIGH = (NUMBERS > 45).astype(np.int64)
+
+
+def _unused_numbers(chosen: List[int]) -> np.ndarray:
+    """Numbers 1-90 not in chosen, ascending"""
+    mask = np.ones(91, dtype=bool)
+    mask[chosen] = False
+    return NUMBERS[mask[1:]]
+
+
+class Draws(list):
+    """
+    Draw history that caches its packed array forms
+
+    Behaves exactly like the list of draws it wraps (slices are plain
+    lists); analyzers that need an (n, 5) array take it from here instead
+    of re-packing the lists. The caches are rebuilt if the length changes.
+    """
+    
+    def __init__(self, draws=()):
+        super().__init__(draws)
+        self._cache = {}
+        self._cache_len = -1
+    
+    def _cached(self, name: str, build) -> np.ndarray:
+        if self._cache_len != len(self):
+            self._cache = {}
+            self._cache_len = len(self)
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+    
+    @property
+    def arr(self) -> np.ndarray:
+        """(n, 5) int64 array of the well-formed draws"""
+        return self._cached('arr', lambda: _pack_draws(self))
+    
+    @property
+    def sorted_arr(self) -> np.ndarray:
+        """arr with each draw sorted ascending"""
+        return self._cached('sorted_arr', lambda: np.sort(self.arr, axis=1))
+    
+    @property
+    def membership(self) -> np.ndarray:
+        """(n, 91) boolean matrix: number k appears in draw i (column 0 unused)"""
+        def build():
+            member = np.zeros((len(self.arr), 91), dtype=bool)
+            member[np.arange(len(self.arr))[:, None], self.arr] = True
+            return member
+        return self._cached('membership', build)
+    
+    def cooccurrence(self, window: int) -> np.ndarray:
+        """(91, 91) count of the last `window` draws containing both numbers"""
+        def build():
+            member = self.membership[-window:].astype(np.int64)
+            return member.T @ member
+        return self._cached(('cooccurrence', window), build)
+
+
+def _pack_draws(draws: List[List[int]], width: int = 5) -> np.ndarray:
+    rows = [draw for draw in draws if len(draw) == width]
+    if not rows:
+        return np.empty((0, width), dtype=np.int64)
+    return np.asarray(rows, dtype=np.int64)
+
+
+def _draws_to_array(draws: List[List[int]]) -> np.ndarray:
+    """Pack draws into an (n, 5) int array, skipping malformed rows"""
+    if isinstance(draws, Draws):
+        return draws.arr
+    return _pack_draws(draws)
+
+
+def _sorted_draws(draws: List[List[int]]) -> np.ndarray:
+    """_draws_to_array with each draw sorted ascending"""
+    if isinstance(draws, Draws):
+        return draws.sorted_arr
+    return np.sort(_pack_draws(draws), axis=1)
+
+
+def _draw_gaps(draws: List[List[int]]) -> np.ndarray:
+    """(n, 4) gaps between consecutive sorted numbers of each draw"""
+    return np.diff(_sorted_draws(draws), axis=1)
+
+
+def _entropy(counts: np.ndarray) -> float:
+    """Shannon entropy (bits) of a histogram, ignoring empty bins"""
+    counts = counts[counts > 0]
+    p = counts / counts.sum() if len(counts) else counts
+    return -(p * np.log2(p)).sum()
+
+
+def _dated_draws(draws_by_date: Dict[str, List[Tuple[List[int], str]]]):
+    """(date_str, (draw, lotto_type)) for every draw of a date -> draws mapping"""
+    for date_str, entries in draws_by_date.items():
+        for draw_data in entries:
+            yield date_str, draw_data
+
+
+def _number_counts(draws: List[List[int]]) -> np.ndarray:
+    """Occurrences of each number across draws, indexed by number"""
+    arr = np.fromiter((n for draw in draws for n in draw), dtype=np.int64)
+    return np.bincount(arr, minlength=91)
+
+
+def _by_frequency(numbers: np.ndarray, freq: np.ndarray) -> np.ndarray:
+    """Distinct values of numbers, highest freq[value] first; ties keep their order of first appearance"""
+    present, first_seen = np.unique(numbers, return_index=True)
+    present = present[np.argsort(first_seen, kind='stable')]
+    return present[np.argsort(-freq[present], kind='stable')]
+
+
+def _top_counts(draws: List[List[int]], k: int) -> np.ndarray:
+    """Occurrence counts of the k most frequent numbers in draws, largest first"""
+    counts = _number_counts(draws)
+    counts = counts[counts > 0]
+    if len(counts) > k:
+        counts = np.partition(counts, len(counts) - k)[-k:]
+    return np.sort(counts)[::-1]
+
+
 class AdvancedPatternDetector:
     """
     Advanced statistical anomaly and pattern detector
@@ -25,7 +161,6 @@ class AdvancedPatternDetector:
         if window_sizes is None:
             window_sizes = [20, 50, 100]
         self.window_sizes = window_sizes
-        self.pattern_memory = deque(maxlen=1000)
 
     def detect_regime_change(self, recent_draws: List[List[int]]) -> Dict:
         """Detect if statistical properties have changed significantly"""
@@ -63,47 +198,36 @@ class AdvancedPatternDetector:
         if not draws:
             return {}
 
-        all_numbers = [num for draw in draws for num in draw]
+        all_numbers = np.fromiter((num for draw in draws for num in draw), dtype=np.int64)
         sums = [sum(draw) for draw in draws]
 
         # Calculate delta entropy (measure of randomness in gaps)
-        deltas = []
-        for draw in draws:
-            if not draw or len(draw) < 2:
-                continue
-            sorted_draw = sorted(draw)
-            if len(sorted_draw) >= 2:
-                deltas.extend([sorted_draw[i] - sorted_draw[i - 1] for i in range(1, len(sorted_draw))])
+        gaps = _draw_gaps(draws)
 
-        delta_counts = Counter(deltas)
-        total = sum(delta_counts.values())
-        entropy = -sum((count / total) * np.log2(count / total) for count in delta_counts.values())
+        entropy = _entropy(np.bincount(gaps.ravel()))
+        number_entropy = _entropy(np.bincount(all_numbers))
 
         # Cluster detection
-        clusters = self._detect_number_clusters(draws)
+        clusters = self._detect_number_clusters(draws, gaps)
 
         return {
             "sum_mean": np.mean(sums),
             "sum_std": np.std(sums),
-            "number_entropy": -sum((all_numbers.count(x) / len(all_numbers)) *
-                                   np.log2(all_numbers.count(x) / len(all_numbers))
-                                   for x in set(all_numbers)),
+            "number_entropy": number_entropy,
             "delta_entropy": entropy,
             "cluster_score": len(clusters) / len(draws) if draws else 0
         }
 
-    def _detect_number_clusters(self, draws: List[List[int]]) -> List[List[int]]:
+    def _detect_number_clusters(self, draws: List[List[int]], gaps: np.ndarray = None) -> List[List[int]]:
         """Detect if numbers in a draw are clustered together"""
-        clusters = []
-        for draw in draws:
-            if not draw or len(draw) < 2:
-                continue
-            sorted_draw = sorted(draw)
-            if len(sorted_draw) >= 2:
-                gaps = [sorted_draw[i] - sorted_draw[i - 1] for i in range(1, len(sorted_draw))]
-                if gaps and max(gaps) < 25:  # Numbers are within 25 of each other
-                    clusters.append(draw)
-        return clusters
+        rows = [draw for draw in draws if len(draw) == 5]
+        if gaps is None:
+            gaps = _draw_gaps(rows)
+        if not rows:
+            return []
+        # Numbers are within 25 of each other
+        mask = gaps.max(axis=1) < 25
+        return [draw for draw, clustered in zip(rows, mask.tolist()) if clustered]
 
 
 class ZoneAnalyzer:
@@ -131,14 +255,12 @@ class ZoneAnalyzer:
         recent_draws = draws[-20:] if len(draws) >= 20 else draws
         
         for draw in draws:
-            zones_in_draw = [self.get_zone(n) for n in draw]
-            for z in zones_in_draw:
-                zone_counts[z] += 1
+            for n in draw:
+                zone_counts[ZONE_OF[n]] += 1
         
         for draw in recent_draws:
-            zones_in_draw = [self.get_zone(n) for n in draw]
-            for z in zones_in_draw:
-                zone_recent[z] += 1
+            for n in draw:
+                zone_recent[ZONE_OF[n]] += 1
         
         # Calculate zone due scores (zones that haven't appeared recently)
         total_draws = len(draws)
@@ -155,7 +277,7 @@ class ZoneAnalyzer:
         # Most common zone combinations
         zone_combos = Counter()
         for draw in draws[-50:]:
-            zones = tuple(sorted(set(self.get_zone(n) for n in draw)))
+            zones = tuple(sorted(set(ZONE_OF[n] for n in draw)))
             zone_combos[zones] += 1
         
         return {
@@ -163,8 +285,8 @@ class ZoneAnalyzer:
             'zone_recent': dict(zone_recent),
             'zone_due_scores': zone_due_scores,
             'common_zone_combos': zone_combos.most_common(5),
-            'hot_zones': [z for z, _ in sorted(zone_recent.items(), key=lambda x: x[1], reverse=True)[:3]],
-            'cold_zones': [z for z, _ in sorted(zone_recent.items(), key=lambda x: x[1])[:3]]
+            'hot_zones': [z for z, _ in zone_recent.most_common(3)],
+            'cold_zones': [z for z, _ in heapq.nsmallest(3, zone_recent.items(), key=lambda x: x[1])]
         }
     
     def get_zone_recommendations(self, zone_analysis: Dict) -> List[int]:
@@ -175,90 +297,141 @@ class ZoneAnalyzer:
         # Balance hot and due zones
         hot = zone_analysis.get('hot_zones', [])[:2]
         due_scores = zone_analysis.get('zone_due_scores', {})
-        due = sorted(due_scores.items(), key=lambda x: x[1], reverse=True)[:2]
+        due = heapq.nlargest(2, due_scores.items(), key=lambda x: x[1])
         due_zones = [z for z, _ in due]
         
         # Combine: 2 hot + 2 due + 1 random for balance
         recommended = list(set(hot + due_zones))
         if len(recommended) < 5:
-            remaining = [z for z in range(9) if z not in recommended]
+            chosen = set(recommended)
+            remaining = [z for z in range(9) if z not in chosen]
             recommended.extend(remaining[:5 - len(recommended)])
         
         return recommended[:5]
 
 
-class GapAnalyzer:
+class LotteryStats:
     """
-    Analyzes gap patterns within draws for prediction enhancement
+    Running gap and position counts over a growing draw history
+
+    update() folds in only the draws it is given, so a history that has
+    been appended to is analyzed without rescanning the earlier draws.
     """
     
-    def analyze_gaps(self, draws: List[List[int]]) -> Dict:
-        """Analyze gap patterns in draws"""
-        if not draws:
-            return {}
-        
-        all_gaps = []
-        gap_sequences = []
-        
-        for draw in draws:
-            sorted_draw = sorted(draw)
-            if len(sorted_draw) >= 2:
-                gaps = [sorted_draw[i] - sorted_draw[i-1] for i in range(1, len(sorted_draw))]
-                all_gaps.extend(gaps)
-                gap_sequences.append(tuple(gaps))
-        
-        gap_counter = Counter(all_gaps)
-        sequence_counter = Counter(gap_sequences)
+    def __init__(self):
+        self.n_draws = 0
+        self.all_gaps = []
+        self.gap_counts = Counter()
+        self.sequence_counts = Counter()
+        # Position 0 = smallest, Position 4 = largest in sorted draw
+        self.position_counts = np.zeros((5, 91), dtype=np.int64)
+        # Draw index where each number first took each position, which is
+        # the tie-break order Counter.most_common() used
+        self.position_first_seen = np.full((5, 91), np.iinfo(np.int64).max, dtype=np.int64)
+    
+    def update(self, draws: List[List[int]]):
+        """Add new draws to the running counts"""
+        arr = _sorted_draws(draws)
+        if not len(arr):
+            return
+        
+        gaps = np.diff(arr, axis=1)
+        new_gaps = gaps.ravel().tolist()
+        self.all_gaps.extend(new_gaps)
+        self.gap_counts.update(new_gaps)
+        self.sequence_counts.update(map(tuple, gaps.tolist()))
+        
+        position_histogram(arr, self.n_draws, self.position_counts, self.position_first_seen)
+        self.n_draws += len(arr)
+    
+    def gap_analysis(self) -> Dict:
+        """Gap patterns of the draws seen so far"""
+        all_gaps = self.all_gaps
         
         # Most common individual gaps
-        common_gaps = gap_counter.most_common(10)
+        common_gaps = self.gap_counts.most_common(10)
         
         # Average and std of gaps
         avg_gap = np.mean(all_gaps) if all_gaps else 0
         std_gap = np.std(all_gaps) if all_gaps else 0
         
         # Common gap sequences (full 4-gap patterns)
-        common_sequences = sequence_counter.most_common(5)
+        common_sequences = self.sequence_counts.most_common(5)
         
         return {
             'common_gaps': common_gaps,
             'avg_gap': avg_gap,
             'std_gap': std_gap,
-            'min_gap': min(all_gaps) if all_gaps else 0,
-            'max_gap': max(all_gaps) if all_gaps else 0,
+            'min_gap': min(self.gap_counts) if all_gaps else 0,
+            'max_gap': max(self.gap_counts) if all_gaps else 0,
             'common_sequences': common_sequences,
             'ideal_gap_range': (max(1, int(avg_gap - std_gap)), int(avg_gap + std_gap))
         }
     
-    def validate_gaps(self, prediction: List[int], gap_analysis: Dict) -> float:
-        """Score a prediction based on gap patterns (0-1)"""
-        if len(prediction) != 5:
-            return 0.0
+    def position_analysis(self) -> Dict:
+        """Positional tendencies of the draws seen so far"""
+        counts = self.position_counts
         
-        sorted_pred = sorted(prediction)
-        gaps = [sorted_pred[i] - sorted_pred[i-1] for i in range(1, 5)]
+        position_favorites = {}
+        position_counts = {}
+        for pos in range(5):
+            seen = np.flatnonzero(counts[pos])
+            seen = seen[np.argsort(self.position_first_seen[pos, seen], kind='stable')]
+            ranked = seen[np.argsort(-counts[pos, seen], kind='stable')]
+            # For each position, get most common numbers
+            position_favorites[pos] = ranked[:15].tolist()
+            position_counts[pos] = dict(zip(seen.tolist(), counts[pos, seen].tolist()))
+        
+        # For each number, get preferred position (first position on ties)
+        totals = counts.sum(axis=0)
+        preferred = counts.argmax(axis=0)
+        number_positions = {num: int(preferred[num]) for num in range(1, 91) if totals[num] > 0}
+        
+        return {
+            'position_favorites': position_favorites,
+            'number_positions': number_positions,
+            'position_counts': position_counts
+        }
+
+
+class GapAnalyzer:
+    """
+    Analyzes gap patterns within draws for prediction enhancement
+    """
+    
+    def analyze_gaps(self, draws: List[List[int]]) -> Dict:
+        """Analyze gap patterns in draws"""
+        if not draws:
+            return {}
         
+        stats = LotteryStats()
+        stats.update(draws)
+        return stats.gap_analysis()
+    
+    def score_table(self, gap_analysis: Dict) -> Tuple[int, int, np.ndarray]:
+        """Ideal gap range and per-gap common-gap weights for validate_gaps"""
         ideal_range = gap_analysis.get('ideal_gap_range', (5, 25))
         common_gaps = dict(gap_analysis.get('common_gaps', []))
         
-        score = 0.0
-        
-        # Check if gaps are in ideal range
-        gaps_in_range = sum(1 for g in gaps if ideal_range[0] <= g <= ideal_range[1])
-        score += gaps_in_range * 0.15
-        
-        # Bonus for common gaps
-        for gap in gaps:
-            if gap in common_gaps:
-                score += 0.1 * (common_gaps[gap] / max(common_gaps.values()))
-        
-        # Penalty for consecutive numbers (gap = 1)
-        consecutive = sum(1 for g in gaps if g == 1)
-        score -= consecutive * 0.1
+        weights = np.full(91, -1.0)
+        if common_gaps:
+            top = max(common_gaps.values())
+            for gap, count in common_gaps.items():
+                weights[gap] = count / top
+        return ideal_range[0], ideal_range[1], weights
+    
+    def validate_gaps(self, prediction: List[int], gap_analysis: Dict,
+                      table: Tuple[int, int, np.ndarray] = None,
+                      sorted_pred: np.ndarray = None) -> float:
+        """Score a prediction based on gap patterns (0-1)"""
+        if len(prediction) != 5:
+            return 0.0
         
-        # Penalty for very large gaps
-        large_gaps = sum(1 for g in gaps if g > 30)
-        score -= large_gaps * 0.1
+        if table is None:
+            table = self.score_table(gap_analysis)
+        if sorted_pred is None:
+            sorted_pred = np.sort(np.asarray(prediction, dtype=np.int64))
+        score = float(score_gaps(sorted_pred, *table))
         
         return max(0, min(1, score))
 
@@ -314,32 +487,47 @@ class TrendAnalyzer:
     
     def get_trending_numbers(self, draws: List[List[int]], top_n: int = 15) -> Dict:
         """Get numbers with strongest trends"""
-        momentums = {}
-        for num in range(1, 91):
-            analysis = self.calculate_momentum(draws, num)
-            momentums[num] = analysis
-        
-        # Sort by momentum
-        rising = sorted(
-            [(n, m) for n, m in momentums.items() if m['trend'] == 'rising'],
-            key=lambda x: x[1]['momentum'], reverse=True
-        )[:top_n]
-        
-        falling = sorted(
-            [(n, m) for n, m in momentums.items() if m['trend'] == 'falling'],
-            key=lambda x: x[1]['momentum']
-        )[:top_n]
-        
-        # Numbers with positive acceleration (trend strengthening)
-        accelerating = sorted(
-            [(n, m) for n, m in momentums.items() if m['acceleration'] > 0.02],
-            key=lambda x: x[1]['acceleration'], reverse=True
-        )[:top_n]
+        windows = [5, 10, 20]
+        if len(draws) < max(windows):
+            momentums = {num: {'momentum': 0, 'trend': 'neutral', 'acceleration': 0}
+                         for num in range(1, 91)}
+            return {'rising': [], 'falling': [], 'accelerating': [], 'all_momentums': momentums}
+        
+        # Membership of each number in the longest window, then per-window
+        # frequencies for all 90 numbers at once (same values as calculate_momentum)
+        recent = np.asarray(draws[-max(windows):], dtype=np.int64)
+        member = np.zeros((len(recent), 91), dtype=np.uint8)
+        member[np.arange(len(recent))[:, None], recent] = 1
+        member = member[:, 1:]
+        freqs = np.stack([member[-w:].sum(axis=0) / w for w in windows])
+        
+        momentum = freqs[0] - freqs[-1]
+        acceleration = (freqs[0] - freqs[1]) - (freqs[1] - freqs[2])
+        
+        # Stable sorts keep ties in ascending number order, as sorted() did
+        rising_idx = np.flatnonzero(momentum > 0.05)
+        rising_idx = rising_idx[np.argsort(-momentum[rising_idx], kind='stable')][:top_n]
+        falling_idx = np.flatnonzero(momentum < -0.05)
+        falling_idx = falling_idx[np.argsort(momentum[falling_idx], kind='stable')][:top_n]
+        accel_idx = np.flatnonzero(acceleration > 0.02)
+        accel_idx = accel_idx[np.argsort(-acceleration[accel_idx], kind='stable')][:top_n]
+        
+        trends = np.where(momentum > 0.05, 'rising', np.where(momentum < -0.05, 'falling', 'neutral'))
+        freq_rows = freqs.T.tolist()
+        momentums = {
+            i + 1: {
+                'momentum': m,
+                'trend': str(t),
+                'acceleration': a,
+                'frequencies': f
+            }
+            for i, (m, t, a, f) in enumerate(zip(momentum.tolist(), trends, acceleration.tolist(), freq_rows))
+        }
         
         return {
-            'rising': [n for n, _ in rising],
-            'falling': [n for n, _ in falling],
-            'accelerating': [n for n, _ in accelerating],
+            'rising': (rising_idx + 1).tolist(),
+            'falling': (falling_idx + 1).tolist(),
+            'accelerating': (accel_idx + 1).tolist(),
             'all_momentums': momentums
         }
 
@@ -349,26 +537,40 @@ class AntiPatternFilter:
     Filters out unlikely patterns that rarely win
     """
     
-    # Common anti-patterns to avoid
-    ANTI_PATTERNS = {
-        'all_evens': lambda nums: all(n % 2 == 0 for n in nums),
-        'all_odds': lambda nums: all(n % 2 == 1 for n in nums),
-        'all_high': lambda nums: all(n > 45 for n in nums),
-        'all_low': lambda nums: all(n <= 45 for n in nums),
-        'all_same_decade': lambda nums: len(set((n-1)//10 for n in nums)) == 1,
-        'consecutive_5': lambda nums: sorted(nums) == list(range(min(nums), min(nums)+5)),
-        'sum_too_low': lambda nums: sum(nums) < 100,
-        'sum_too_high': lambda nums: sum(nums) > 350,
-        'all_multiples_5': lambda nums: all(n % 5 == 0 for n in nums),
-        'all_multiples_10': lambda nums: all(n % 10 == 0 for n in nums),
-    }
+    # Common anti-patterns to avoid, evaluated on a bitmask of the
+    # prediction (bit n set for number n)
+    EVEN_MASK = sum(1 << n for n in range(2, 91, 2))
+    ODD_MASK = sum(1 << n for n in range(1, 91, 2))
+    HIGH_MASK = sum(1 << n for n in range(46, 91))
+    LOW_MASK = sum(1 << n for n in range(1, 46))
+    MULT5_MASK = sum(1 << n for n in range(5, 91, 5))
+    MULT10_MASK = sum(1 << n for n in range(10, 91, 10))
     
     def check_patterns(self, prediction: List[int]) -> Dict:
         """Check prediction against anti-patterns"""
-        violations = {}
-        for name, check in self.ANTI_PATTERNS.items():
-            if check(prediction):
-                violations[name] = True
+        bits = 0
+        total = 0
+        for n in prediction:
+            n = int(n)
+            bits |= 1 << n
+            total += n
+        lowest = (bits & -bits).bit_length() - 1
+        highest = bits.bit_length() - 1
+        
+        checks = (
+            ('all_evens', not bits & ~self.EVEN_MASK),
+            ('all_odds', not bits & ~self.ODD_MASK),
+            ('all_high', not bits & ~self.HIGH_MASK),
+            ('all_low', not bits & ~self.LOW_MASK),
+            ('all_same_decade', ZONE_OF[lowest] == ZONE_OF[highest]),
+            # Five distinct numbers spanning exactly 4
+            ('consecutive_5', len(prediction) == 5 and bits == 0b11111 << lowest),
+            ('sum_too_low', total < 100),
+            ('sum_too_high', total > 350),
+            ('all_multiples_5', not bits & ~self.MULT5_MASK),
+            ('all_multiples_10', not bits & ~self.MULT10_MASK),
+        )
+        violations = {name: True for name, violated in checks if violated}
         
         return {
             'is_valid': len(violations) == 0,
@@ -383,8 +585,15 @@ class AntiPatternFilter:
             number_pool = list(range(1, 91))
         
         result = prediction.copy()
+        result_set = set(result)
         max_iterations = 10
         
+        # Replacement pools for each rule, filtered once
+        odd_pool = [n for n in number_pool if n % 2 == 1]
+        even_pool = [n for n in number_pool if n % 2 == 0]
+        low_pool = [n for n in number_pool if n <= 45]
+        high_pool = [n for n in number_pool if n > 45]
+        
         for _ in range(max_iterations):
             check = self.check_patterns(result)
             if check['is_valid']:
@@ -398,7 +607,7 @@ class AntiPatternFilter:
                 evens = [n for n in result if n % 2 == 0]
                 if evens:
                     to_replace = evens[0]
-                    candidates = [n for n in number_pool if n % 2 == 1 and n not in result]
+                    candidates = [n for n in odd_pool if n not in result_set]
                     if candidates:
                         result[result.index(to_replace)] = candidates[len(candidates)//2]
             
@@ -406,7 +615,7 @@ class AntiPatternFilter:
                 odds = [n for n in result if n % 2 == 1]
                 if odds:
                     to_replace = odds[0]
-                    candidates = [n for n in number_pool if n % 2 == 0 and n not in result]
+                    candidates = [n for n in even_pool if n not in result_set]
                     if candidates:
                         result[result.index(to_replace)] = candidates[len(candidates)//2]
             
@@ -414,7 +623,7 @@ class AntiPatternFilter:
                 highs = [n for n in result if n > 45]
                 if highs:
                     to_replace = highs[0]
-                    candidates = [n for n in number_pool if n <= 45 and n not in result]
+                    candidates = [n for n in low_pool if n not in result_set]
                     if candidates:
                         result[result.index(to_replace)] = candidates[len(candidates)//2]
             
@@ -422,7 +631,7 @@ class AntiPatternFilter:
                 lows = [n for n in result if n <= 45]
                 if lows:
                     to_replace = lows[0]
-                    candidates = [n for n in number_pool if n > 45 and n not in result]
+                    candidates = [n for n in high_pool if n not in result_set]
                     if candidates:
                         result[result.index(to_replace)] = candidates[len(candidates)//2]
             
@@ -430,7 +639,7 @@ class AntiPatternFilter:
                 # Replace lowest number with higher
                 result.sort()
                 to_replace = result[0]
-                candidates = [n for n in number_pool if n > 60 and n not in result]
+                candidates = [n for n in high_pool if n > 60 and n not in result_set]
                 if candidates:
                     result[0] = candidates[0]
             
@@ -438,9 +647,11 @@ class AntiPatternFilter:
                 # Replace highest number with lower
                 result.sort()
                 to_replace = result[-1]
-                candidates = [n for n in number_pool if n < 30 and n not in result]
+                candidates = [n for n in low_pool if n < 30 and n not in result_set]
                 if candidates:
                     result[-1] = candidates[-1]
+            
+            result_set = set(result)
         
         return sorted(result)
 
@@ -452,54 +663,32 @@ class PositionAnalyzer:
     
     def analyze_positions(self, draws: List[List[int]]) -> Dict:
         """Analyze which positions numbers tend to appear in"""
-        # Position 0 = smallest, Position 4 = largest in sorted draw
-        position_counts = {pos: Counter() for pos in range(5)}
-        
-        for draw in draws:
-            sorted_draw = sorted(draw)
-            for pos, num in enumerate(sorted_draw):
-                position_counts[pos][num] += 1
-        
-        # For each position, get most common numbers
-        position_favorites = {}
-        for pos in range(5):
-            top_nums = position_counts[pos].most_common(15)
-            position_favorites[pos] = [n for n, _ in top_nums]
-        
-        # For each number, get preferred position
-        number_positions = {}
-        for num in range(1, 91):
-            pos_counts = [(pos, position_counts[pos].get(num, 0)) for pos in range(5)]
-            if sum(c for _, c in pos_counts) > 0:
-                preferred_pos = max(pos_counts, key=lambda x: x[1])[0]
-                number_positions[num] = preferred_pos
-        
-        return {
-            'position_favorites': position_favorites,
-            'number_positions': number_positions,
-            'position_counts': {pos: dict(counts) for pos, counts in position_counts.items()}
-        }
+        stats = LotteryStats()
+        stats.update(draws)
+        return stats.position_analysis()
+    
+    def score_table(self, position_analysis: Dict) -> np.ndarray:
+        """(5, 91) rank of each number among each position's favorites, -1 if absent"""
+        ranks = np.full((5, 91), -1, dtype=np.int64)
+        for pos, favorites in position_analysis.get('position_favorites', {}).items():
+            if 0 <= pos < 5:
+                # First occurrence wins, as list membership did
+                for rank, num in reversed(list(enumerate(favorites))):
+                    ranks[pos, num] = rank
+        return ranks
     
     def validate_positions(self, prediction: List[int], 
-                          position_analysis: Dict) -> float:
+                          position_analysis: Dict, rank_table: np.ndarray = None,
+                          sorted_pred: np.ndarray = None) -> float:
         """Score prediction based on positional tendencies"""
         if not prediction or len(prediction) != 5:
             return 0.5
         
-        sorted_pred = sorted(prediction)
-        position_favorites = position_analysis.get('position_favorites', {})
-        
-        score = 0.0
-        for pos, num in enumerate(sorted_pred):
-            favorites = position_favorites.get(pos, [])
-            if num in favorites[:5]:
-                score += 0.15
-            elif num in favorites[:10]:
-                score += 0.1
-            elif num in favorites:
-                score += 0.05
-        
-        return min(1.0, score)
+        if rank_table is None:
+            rank_table = self.score_table(position_analysis)
+        if sorted_pred is None:
+            sorted_pred = np.sort(np.asarray(prediction, dtype=np.int64))
+        return float(score_positions(sorted_pred, rank_table))
 
 
 class ConfidenceScorer:
@@ -512,6 +701,36 @@ class ConfidenceScorer:
         self.gap_analyzer = GapAnalyzer()
         self.anti_pattern = AntiPatternFilter()
         self.position_analyzer = PositionAnalyzer()
+        # Gap/position analyses of the last history scored (predictions in one batch share it)
+        self._stats = LotteryStats()
+        self._analyzed_draws = None
+        self._analyzed_len = 0
+        self._gap_analysis = None
+        self._position_analysis = None
+        self._gap_table = None
+        self._position_table = None
+        self._recent_counts = Counter()
+    
+    def _analyze_history(self, draws: List[List[int]]) -> Tuple[Dict, Dict]:
+        """Gap and position analyses of draws, updated only when the history changes"""
+        if draws is self._analyzed_draws and len(draws) == self._analyzed_len:
+            return self._gap_analysis, self._position_analysis
+        
+        if draws is not self._analyzed_draws or len(draws) < self._analyzed_len:
+            # A different (or truncated) history: start the counts over
+            self._stats = LotteryStats()
+            self._analyzed_len = 0
+        # Only draws appended since the last call are added
+        self._stats.update(draws[self._analyzed_len:])
+        self._analyzed_draws = draws
+        self._analyzed_len = len(draws)
+        self._gap_analysis = self._stats.gap_analysis() if draws else {}
+        self._position_analysis = self._stats.position_analysis()
+        self._gap_table = self.gap_analyzer.score_table(self._gap_analysis)
+        self._position_table = self.position_analyzer.score_table(self._position_analysis)
+        # Number of the last 50 draws each number appears in
+        self._recent_counts = Counter(n for d in draws[-50:] for n in set(d))
+        return self._gap_analysis, self._position_analysis
     
     def calculate_confidence(self, prediction: List[int], 
                             draws: List[List[int]],
@@ -521,16 +740,16 @@ class ConfidenceScorer:
             return {'confidence': 0, 'level': 'invalid', 'factors': {}}
         
         factors = {}
+        gap_analysis, position_analysis = self._analyze_history(draws)
+        # Sorted once and shared by the gap and position scores
+        sorted_pred = np.sort(np.asarray(prediction, dtype=np.int64))
         
         # 1. Zone distribution score
-        zone_analysis = self.zone_analyzer.analyze_zone_patterns(draws)
-        zones_in_pred = [self.zone_analyzer.get_zone(n) for n in prediction]
-        zone_diversity = len(set(zones_in_pred)) / 5
+        zone_diversity = len(set(ZONE_OF[n] for n in prediction)) / 5
         factors['zone_diversity'] = zone_diversity
         
         # 2. Gap pattern score
-        gap_analysis = self.gap_analyzer.analyze_gaps(draws)
-        gap_score = self.gap_analyzer.validate_gaps(prediction, gap_analysis)
+        gap_score = self.gap_analyzer.validate_gaps(prediction, gap_analysis, self._gap_table, sorted_pred)
         factors['gap_pattern'] = gap_score
         
         # 3. Anti-pattern check
@@ -538,8 +757,8 @@ class ConfidenceScorer:
         factors['pattern_validity'] = anti_check['score']
         
         # 4. Position analysis
-        position_analysis = self.position_analyzer.analyze_positions(draws)
-        position_score = self.position_analyzer.validate_positions(prediction, position_analysis)
+        position_score = self.position_analyzer.validate_positions(prediction, position_analysis,
+                                                                   self._position_table, sorted_pred)
         factors['position_alignment'] = position_score
         
         # 5. Strategy agreement (from consensus)
@@ -548,8 +767,7 @@ class ConfidenceScorer:
         # 6. Historical frequency
         freq_score = 0
         for num in prediction:
-            appearances = sum(1 for d in draws[-50:] if num in d)
-            freq_score += min(appearances / 10, 0.2)
+            freq_score += min(self._recent_counts[num] / 10, 0.2)
         factors['historical_frequency'] = min(1.0, freq_score)
         
         # Calculate weighted confidence
@@ -641,38 +859,118 @@ class MLPredictor:
         if n_draws < lookback + 10:
             return np.array([]), np.array([])
 
-        X, y = [], []
+        arrays = self._history_arrays(historical_draws)
 
-        for i in range(lookback, n_draws - 1):
-            # Features based on recent history - with bounds checking
-            if i + 1 >= n_draws:
-                continue  # Skip if next_draw index is out of bounds
-            recent = historical_draws[i - lookback:i] if i - lookback >= 0 else historical_draws[:i]
-            next_draw = historical_draws[i + 1]
+        # One sample per (i, number): features from draws[i - lookback:i] (skips up to
+        # draw i), label is whether the number appears in draw i + 1
+        ends = np.arange(lookback, n_draws - 1)
+        X = self._number_features(arrays, ends, ends + 1, lookback)
 
-            for num in range(1, 91):
-                # Feature vector for this number
-                features = [
-                    # Recent frequency
-                    sum(1 for draw in recent if num in draw) / lookback,
-                    # Skips (how many draws since last appearance)
-                    self._calculate_skips(num, historical_draws[:i + 1]),
-                    # Position tendency
-                    self._position_tendency(num, recent),
-                    # Delta relationships
-                    self._delta_compatibility(num, recent),
-                    # Even/Odd context
-                    num % 2,
-                    # High/Low
-                    1 if num > 45 else 0,
-                    # Recent trend (appearing more or less frequently)
-                    self._trend_score(num, recent[-10:] if len(recent) >= 10 else recent)
-                ]
-
-                X.append(features)
-                y.append(1 if num in next_draw else 0)
-
-        return np.array(X), np.array(y)
+        member = arrays[2]
+        y = member[ends + 1].reshape(-1).astype(np.int64)
+
+        return X, y
+
+    @staticmethod
+    def _membership(draws_arr: np.ndarray) -> np.ndarray:
+        """(n_draws, 90) boolean matrix: number k+1 appears in draw i"""
+        member = np.zeros((len(draws_arr), 91), dtype=bool)
+        member[np.arange(len(draws_arr))[:, None], draws_arr] = True
+        return member[:, 1:]
+
+    @classmethod
+    def _history_arrays(cls, historical_draws: List[List[int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(draws, row-sorted draws, membership) arrays, taken from the Draws caches when available"""
+        if isinstance(historical_draws, Draws):
+            return historical_draws.arr, historical_draws.sorted_arr, historical_draws.membership[:, 1:]
+        draws_arr = np.asarray(historical_draws, dtype=np.int64)
+        return draws_arr, np.sort(draws_arr, axis=1), cls._membership(draws_arr)
+
+    def _number_features(self, arrays: Tuple[np.ndarray, np.ndarray, np.ndarray], ends: np.ndarray,
+                         skip_ends: np.ndarray, window: int) -> np.ndarray:
+        """
+        Feature rows for all 90 numbers at each window end, shape (len(ends) * 90, 7).
+
+        Columns are frequency, skips, position tendency, delta compatibility,
+        parity, high and trend; for end e the window is draws[e - window:e] and
+        skips are counted over draws[:skip_end]. arrays is a _history_arrays
+        triple.
+        """
+        draws_arr, sorted_arr, member = arrays
+        n_draws = len(draws_arr)
+        rows = np.arange(n_draws)
+        starts = ends - window
+
+        def prefix_sums(per_draw: np.ndarray) -> np.ndarray:
+            prefix = np.zeros((n_draws + 1, per_draw.shape[1]), dtype=per_draw.dtype)
+            np.cumsum(per_draw, axis=0, out=prefix[1:])
+            return prefix
+
+        def windowed(per_draw: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+            # Sum per-draw rows over [lo, hi) via prefix sums
+            prefix = prefix_sums(per_draw)
+            return prefix[hi] - prefix[lo]
+
+        occurrences = np.bincount((rows[:, None] * 91 + draws_arr).ravel(),
+                                  minlength=n_draws * 91).reshape(n_draws, 91)[:, 1:]
+
+        # Appearance counts over any draw range, shared by frequency and trend
+        member_prefix = prefix_sums(member.astype(np.int64))
+
+        # Recent frequency
+        appearances = member_prefix[ends] - member_prefix[starts]
+        freq = appearances / window
+
+        # Skips: draws since the last appearance at or before skip_end - 1
+        last_seen = np.maximum.accumulate(np.where(member, rows[:, None], -1), axis=0)
+        skips = (skip_ends - 1)[:, None] - last_seen[skip_ends - 1]
+
+        # Position tendency: mean (index in sorted draw) / 4 over draws containing the number
+        first_index = np.tile(np.arange(sorted_arr.shape[1]), (n_draws, 1))
+        for j in range(1, sorted_arr.shape[1]):
+            dup = sorted_arr[:, j] == sorted_arr[:, j - 1]
+            first_index[dup, j] = first_index[dup, j - 1]
+        positions = np.zeros((n_draws, 91), dtype=np.int64)
+        positions[rows[:, None], sorted_arr] = first_index
+        position_sum = windowed(positions[:, 1:], starts, ends)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position = np.where(appearances > 0, (position_sum / 4) / appearances, 0.5)
+
+        # Delta compatibility: for every number in the window within 30 of num, how common
+        # |num - other| is among the deltas of the window's last 10 draws
+        deltas = np.diff(sorted_arr, axis=1)
+        delta_hist = np.bincount((rows[:, None] * 90 + deltas).ravel(),
+                                 minlength=n_draws * 90).reshape(n_draws, 90)
+        delta_start = np.maximum(ends - 10, starts)
+        delta_counts = windowed(delta_hist, delta_start, ends)
+        n_deltas = (ends - delta_start) * deltas.shape[1]
+        window_counts = windowed(occurrences, starts, ends)
+        matched = window_counts * delta_counts[:, :1]
+        pairs = window_counts.copy()
+        for d in range(1, 31):
+            matched[:, d:] += window_counts[:, :-d] * delta_counts[:, d:d + 1]
+            matched[:, :-d] += window_counts[:, d:] * delta_counts[:, d:d + 1]
+            pairs[:, d:] += window_counts[:, :-d]
+            pairs[:, :-d] += window_counts[:, d:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta_compat = np.where(pairs > 0, matched / (n_deltas + 1)[:, None] / pairs, 0)
+
+        # Recent trend over the last (up to) 10 draws of the window
+        trend_len = min(10, window)
+        if trend_len < 5:
+            trend = np.full((len(ends), 90), 0.5)
+        else:
+            half = trend_len // 2
+            split = ends - trend_len + half
+            first = member_prefix[split] - member_prefix[ends - trend_len]
+            second = member_prefix[ends] - member_prefix[split]
+            trend = (second / (trend_len - half + 1) - first / (half + 1) + 1) / 2
+
+        parity = np.broadcast_to(PARITY, freq.shape)
+        high = np.broadcast_to(HIGH, freq.shape)
+
+        features = np.stack([freq, skips, position, delta_compat, parity, high, trend], axis=-1)
+        return features.reshape(-1, 7).astype(np.float64)
 
     def train(self, historical_draws: List[List[int]]):
         """Train ML models"""
@@ -737,98 +1035,24 @@ class MLPredictor:
         if not self.is_trained:
             return {i: 1 / 90 for i in range(1, 91)}
 
-        # Create features for current state
-        recent = historical_draws[-50:] if len(historical_draws) >= 50 else historical_draws
-        predictions = {}
+        # Create features for current state: one row per number, windowed over
+        # the last 50 draws with skips counted over the whole history
+        arrays = self._history_arrays(historical_draws)
+        end = np.array([len(arrays[0])])
+        features = self._number_features(arrays, end, end, min(50, len(arrays[0])))
+        # Same arithmetic as StandardScaler.transform, without its input validation
+        features_scaled = (features - self.scaler.mean_) / self.scaler.scale_
 
-        for num in range(1, 91):
-            features = [
-                sum(1 for draw in recent if num in draw) / len(recent),
-                self._calculate_skips(num, historical_draws),
-                self._position_tendency(num, recent),
-                self._delta_compatibility(num, recent),
-                num % 2,
-                1 if num > 45 else 0,
-                self._trend_score(num, recent[-10:] if len(recent) >= 10 else recent)
-            ]
-
-            features_scaled = self.scaler.transform([features])
-
-            # Ensemble prediction (average of all models)
-            probs = []
-            for model in self.models.values():
-                prob = model.predict_proba(features_scaled)[0][1]
-                probs.append(prob)
-
-            predictions[num] = np.mean(probs)
+        # Ensemble prediction (average of all models)
+        probs = np.mean([model.predict_proba(features_scaled)[:, 1] for model in self.models.values()],
+                        axis=0).tolist()
 
         # Normalize to sum to 1 (probability distribution)
-        total = sum(predictions.values())
+        total = sum(probs)
         if total > 0:
-            predictions = {k: v / total for k, v in predictions.items()}
+            probs = [p / total for p in probs]
 
-        return predictions
-
-    def _calculate_skips(self, num: int, draws: List[List[int]]) -> int:
-        """Calculate how many draws since number last appeared"""
-        for i in range(len(draws) - 1, -1, -1):
-            if num in draws[i]:
-                return len(draws) - i - 1
-        return len(draws)
-
-    def _position_tendency(self, num: int, draws: List[List[int]]) -> float:
-        """Calculate tendency to appear in specific position"""
-        if not draws:
-            return 0.5
-
-        positions = []
-        for draw in draws:
-            if num in draw:
-                sorted_draw = sorted(draw)
-                positions.append(sorted_draw.index(num) / 4)  # Normalize to 0-1
-
-        return np.mean(positions) if positions else 0.5
-
-    def _delta_compatibility(self, num: int, draws: List[List[int]]) -> float:
-        """Calculate compatibility with common deltas"""
-        if not draws:
-            return 0
-
-        compat_scores = []
-        for draw in draws:
-            if len(draw) >= 2:
-                # Check if num would create common deltas with any number in draw
-                for other in draw:
-                    delta = abs(num - other)
-                    if delta <= 30:  # Common delta range
-                        # Check if this delta is common in recent history
-                        recent_deltas = []
-                        for d in draws[-10:]:
-                            if not d or len(d) < 2:
-                                continue
-                            sorted_d = sorted(d)
-                            if len(sorted_d) >= 2:
-                                recent_deltas.extend([sorted_d[i] - sorted_d[i - 1] for i in range(1, len(sorted_d))])
-
-                        delta_count = sum(1 for d in recent_deltas if d == delta)
-                        compat_scores.append(delta_count / (len(recent_deltas) + 1))
-
-        return np.mean(compat_scores) if compat_scores else 0
-
-    def _trend_score(self, num: int, recent_draws: List[List[int]]) -> float:
-        """Calculate if number is trending up or down in frequency"""
-        if len(recent_draws) < 5:
-            return 0.5
-
-        # Split into two halves
-        half = len(recent_draws) // 2
-        first = recent_draws[:half]
-        second = recent_draws[half:]
-
-        freq_first = sum(1 for draw in first if num in draw) / (len(first) + 1)
-        freq_second = sum(1 for draw in second if num in draw) / (len(second) + 1)
-
-        return (freq_second - freq_first + 1) / 2  # Normalize to 0-1
+        return dict(zip(range(1, 91), probs))
 
 
 class GeneticOptimizer:
@@ -836,37 +1060,55 @@ class GeneticOptimizer:
     Evolutionary algorithm to optimize number selection
     """
 
-    def __init__(self, population_size: int = 150, generations: int = 75):
+    def __init__(self, population_size: int = 150, generations: int = 75,
+                 rng: random.Random = None, elite_k: int = 0):
+        if not 0 <= elite_k < population_size:
+            raise ValueError("elite_k must be at least 0 and less than population_size")
         self.pop_size = population_size
         self.generations = generations
-        # Note: Seed will be set by parent before calling evolve_solution
+        # Best individuals carried unchanged (with their fitness) into each
+        # next generation; 0 replaces the whole population every generation
+        self.elite_k = elite_k
+        # Private stream for the GA's draws; None uses the global random
+        # module, whose seed will be set by parent before calling evolve_solution
+        self.rng = rng
+
+    @property
+    def _random(self):
+        return random if self.rng is None else self.rng
+
+    def _evaluate(self, population: List[List[int]], fitness_args: Tuple) -> List[float]:
+        """Fitness of every individual, in order"""
+        pop_arr = np.array(population, dtype=np.int32)
+        return population_fitness(pop_arr, *fitness_args).tolist()
 
     def evolve_solution(self, number_probs: Dict[int, float],
                         constraints: Dict) -> List[int]:
         """Evolve optimal number set using genetic algorithm"""
+        # Probabilities indexed directly by number (0 for numbers not in the dict)
+        prob_vec = np.zeros(91)
+        prob_vec[list(number_probs)] = list(number_probs.values())
 
         # Initial population
-        population = []
-        for _ in range(self.pop_size):
-            individual = self._generate_individual(number_probs, constraints)
-            population.append(individual)
+        population = self._generate_population(prob_vec, constraints, self.pop_size)
+        fitness_args = self._fitness_args(prob_vec, constraints)
+        sample, rand = self._random.sample, self._random.random
+
+        fitness_scores = np.asarray(self._evaluate(population, fitness_args))
+        n_offspring = self.pop_size - self.elite_k
 
         # Evolution loop
         for generation in range(self.generations):
-            # Evaluate fitness
-            fitness_scores = [self._fitness(ind, number_probs, constraints)
-                              for ind in population]
-
-            # Selection (tournament)
-            selected = []
-            for _ in range(self.pop_size):
-                tournament = random.sample(list(zip(population, fitness_scores)), 3)
-                winner = max(tournament, key=lambda x: x[1])[0]
-                selected.append(winner)
+            # Selection (tournament): sampling indices draws the same
+            # tournaments as sampling the (individual, fitness) pairs
+            contenders = range(len(population))
+            idx = np.array([sample(contenders, 3) for _ in range(n_offspring)])
+            winners = idx[np.arange(n_offspring), np.argmax(fitness_scores[idx], axis=1)]
+            selected = [population[i] for i in winners]
 
             # Crossover and mutation
-            new_population = []
-            for i in range(0, self.pop_size, 2):
+            offspring = []
+            for i in range(0, n_offspring, 2):
                 parent1 = selected[i]
                 parent2 = selected[i + 1] if i + 1 < len(selected) else selected[0]
 
@@ -874,85 +1116,65 @@ class GeneticOptimizer:
                 child1, child2 = self._crossover(parent1, parent2)
 
                 # Mutation
-                if random.random() < 0.3:
-                    child1 = self._mutate(child1, number_probs, constraints)
-                if random.random() < 0.3:
-                    child2 = self._mutate(child2, number_probs, constraints)
-
-                new_population.extend([child1, child2])
-
-            population = new_population[:self.pop_size]
-
-        # Return best individual
-        best_idx = np.argmax([self._fitness(ind, number_probs, constraints)
-                              for ind in population])
-        return sorted(population[best_idx])
-
-    def _generate_individual(self, probs: Dict[int, float],
-                             constraints: Dict) -> List[int]:
+                if rand() < 0.3:
+                    child1 = self._mutate(child1, prob_vec, constraints)
+                if rand() < 0.3:
+                    child2 = self._mutate(child2, prob_vec, constraints)
+
+                offspring.extend([child1, child2])
+            offspring = offspring[:n_offspring]
+
+            # Elites survive with their known fitness; only offspring are scored
+            elites = np.argsort(-fitness_scores, kind='stable')[:self.elite_k]
+            population = [population[i] for i in elites] + offspring
+            fitness_scores = np.concatenate([fitness_scores[elites],
+                                             self._evaluate(offspring, fitness_args)])
+
+        # Return best individual of the final generation (without elites,
+        # earlier generations' best are not kept)
+        best_idx = np.argmax(fitness_scores)
+        return population[best_idx]  # individuals are kept sorted
+
+    def _generate_population(self, prob_vec: np.ndarray, constraints: Dict,
+                             n: int) -> List[List[int]]:
+        """Generate n initial individuals respecting constraints"""
+        # Same draws as passing weights= to every choices() call
+        cum_weights = np.cumsum(prob_vec[1:]).tolist()
+        return [self._generate_individual(cum_weights, constraints) for _ in range(n)]
+
+    def _generate_individual(self, cum_weights: List[float], constraints: Dict) -> List[int]:
         """Generate initial individual respecting constraints"""
         while True:
             # Weighted selection based on probabilities
-            numbers = list(probs.keys())
-            weights = list(probs.values())
-            individual = random.choices(numbers, weights=weights, k=5)
+            individual = self._random.choices(range(1, 91), cum_weights=cum_weights, k=5)
             individual = list(set(individual))  # Remove duplicates
 
             if len(individual) < 5:
                 # Fill with random numbers
-                remaining = [n for n in numbers if n not in individual]
-                individual.extend(random.sample(remaining, 5 - len(individual)))
+                remaining = _unused_numbers(individual).tolist()
+                individual.extend(self._random.sample(remaining, 5 - len(individual)))
 
             if self._satisfies_constraints(individual, constraints):
                 return sorted(individual)
 
-    def _fitness(self, individual: List[int], probs: Dict[int, float],
-                 constraints: Dict) -> float:
-        """Calculate fitness of an individual"""
-        # Probability score
-        prob_score = sum(probs.get(num, 0) for num in individual)
-
-        # Constraint satisfaction
-        constraint_score = self._constraint_score(individual, constraints)
-
-        # Diversity bonus (avoid consecutive numbers)
-        sorted_ind = sorted(individual)
-        if len(sorted_ind) < 5:
-            return 0.0  # Invalid individual
-        consecutive_penalty = sum(1 for i in range(4)
-                                  if i + 1 < len(sorted_ind) and sorted_ind[i + 1] - sorted_ind[i] == 1) * 0.1
-
-        return prob_score * constraint_score - consecutive_penalty
-
-    def _constraint_score(self, individual: List[int],
-                          constraints: Dict) -> float:
-        """Calculate how well constraints are satisfied"""
-        score = 1.0
-
-        # Sum constraint
-        if 'target_sum_range' in constraints:
-            low, high = constraints['target_sum_range']
-            total = sum(individual)
-            if low <= total <= high:
-                score *= 1.2
-            else:
-                score *= 0.8
-
-        # Even/Odd balance
-        evens = sum(1 for n in individual if n % 2 == 0)
-        if 'even_odd_target' in constraints:
-            target = constraints['even_odd_target']
-            if evens in target:
-                score *= 1.1
+    @staticmethod
+    def _fitness_args(prob_vec: np.ndarray, constraints: Dict) -> Tuple:
+        """
+        population_fitness arguments after the population, built once per run.
 
-        # High/Low balance
-        highs = sum(1 for n in individual if n > 45)
-        if 'high_low_target' in constraints:
-            target = constraints['high_low_target']
-            if highs in target:
-                score *= 1.1
+        Rows scored with them must be sorted ascending, as every individual
+        the GA builds is.
+        """
+        def target_table(key: str) -> np.ndarray:
+            # Which per-individual counts (0-5) the constraint asks for
+            table = np.zeros(6, dtype=bool)
+            table[[t for t in constraints.get(key, ()) if 0 <= t <= 5]] = True
+            return table
 
-        return score
+        has_sum = 'target_sum_range' in constraints
+        low, high = constraints['target_sum_range'] if has_sum else (0, 0)
+        return (prob_vec, has_sum, low, high,
+                target_table('even_odd_target'), target_table('high_low_target'))
 
     def _satisfies_constraints(self, individual: List[int],
                                constraints: Dict) -> bool:
@@ -973,58 +1195,59 @@ class GeneticOptimizer:
     def _crossover(self, parent1: List[int], parent2: List[int]) -> Tuple[List[int], List[int]]:
         """Crossover two parents to create children"""
         # Single point crossover
-        point = random.randint(1, 4)
-        child1 = parent1[:point] + [n for n in parent2 if n not in parent1[:point]]
-        child2 = parent2[:point] + [n for n in parent1 if n not in parent2[:point]]
+        point = self._random.randint(1, 4)
 
-        # Ensure 5 unique numbers
-        child1 = list(set(child1))[:5]
-        child2 = list(set(child2))[:5]
+        # Ensure 5 unique numbers: the set drops the other parent's repeats
+        # of the head, inserting in the same order as filtering them first
+        child1 = list(set(parent1[:point] + parent2))[:5]
+        child2 = list(set(parent2[:point] + parent1))[:5]
 
         # Fill if needed
         if len(child1) < 5:
-            remaining = [n for n in range(1, 91) if n not in child1]
-            child1.extend(random.sample(remaining, 5 - len(child1)))
+            remaining = _unused_numbers(child1).tolist()
+            child1.extend(self._random.sample(remaining, 5 - len(child1)))
         if len(child2) < 5:
-            remaining = [n for n in range(1, 91) if n not in child2]
-            child2.extend(random.sample(remaining, 5 - len(child2)))
+            remaining = _unused_numbers(child2).tolist()
+            child2.extend(self._random.sample(remaining, 5 - len(child2)))
 
         return sorted(child1), sorted(child2)
 
-    def _mutate(self, individual: List[int], probs: Dict[int, float],
+    def _mutate(self, individual: List[int], prob_vec: np.ndarray,
                 constraints: Dict) -> List[int]:
-        """Mutate an individual"""
-        mutated = individual.copy()
+        """Mutate an individual; it may be modified in place, so pass a fresh child"""
+        mutated = individual
 
         # Random mutation type
-        mutation_type = random.choice(['swap', 'replace', 'shift'])
+        mutation_type = self._random.choice(['swap', 'replace', 'shift'])
 
         if mutation_type == 'swap':
-            # Swap two positions
-            i, j = random.sample(range(5), 2)
-            mutated[i], mutated[j] = mutated[j], mutated[i]
+            # Swapping two positions of a sorted individual would be undone by
+            # the final sort; the positions are still drawn to keep the stream
+            self._random.sample(range(5), 2)
+            return mutated
 
         elif mutation_type == 'replace':
             # Replace one number
-            idx = random.randint(0, 4)
+            idx = self._random.randint(0, 4)
             old_num = mutated[idx]
 
             # Choose new number based on probabilities
-            candidates = [n for n in range(1, 91) if n not in mutated]
-            weights = [probs.get(n, 0) for n in candidates]
+            candidates = _unused_numbers(mutated)
+            weights = prob_vec[candidates].tolist()
+            candidates = candidates.tolist()
 
             if sum(weights) > 0:
-                new_num = random.choices(candidates, weights=weights)[0]
+                new_num = self._random.choices(candidates, weights=weights)[0]
                 mutated[idx] = new_num
 
         elif mutation_type == 'shift':
             # Shift all numbers by small amount
-            shift = random.randint(-5, 5)
+            shift = self._random.randint(-5, 5)
             mutated = [(n + shift - 1) % 90 + 1 for n in mutated]
             mutated = list(set(mutated))
             if len(mutated) < 5:
-                remaining = [n for n in range(1, 91) if n not in mutated]
-                mutated.extend(random.sample(remaining, 5 - len(mutated)))
+                remaining = _unused_numbers(mutated).tolist()
+                mutated.extend(self._random.sample(remaining, 5 - len(mutated)))
 
         return sorted(mutated)
 
@@ -1044,9 +1267,24 @@ class MLYearlyPredictor:
     3. Use trained models to predict current year draws based on learned patterns
     """
     
-    def __init__(self):
+    # Keys of extract_date_features, in feature order
+    DATE_FEATURES = ('day_of_month', 'day_of_week', 'week_of_month', 'month', 'day_of_year',
+                     'day_sin', 'day_cos', 'month_sin', 'month_cos')
+    
+    # Saved model files (yearly-<fingerprint>.joblib) kept in model_dir; every
+    # new draw changes the fingerprint, so older files are pruned after a save
+    SAVED_MODEL_PATTERN = 'yearly-*.joblib'
+    KEEP_SAVED_MODELS = 2
+    
+    def __init__(self, n_estimators: int = None, max_depth: int = None, model_dir: str = None):
+        # Random forest size; None picks it from the training sample count
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        # Directory where trained models are saved and reloaded, keyed by
+        # their training data; None uses $YEARLY_MODEL_DIR (unset disables it)
+        self.model_dir = model_dir if model_dir is not None else os.environ.get('YEARLY_MODEL_DIR')
         self.models = {}  # Store trained models per feature type
-        self.feature_scaler = StandardScaler()
+        self._lotto_type_ids = {}  # Lotto type -> stable feature id, set in training
         self.trained = False
         self.feature_importance = {}
         # Define fixed feature order to ensure consistency
@@ -1055,7 +1293,7 @@ class MLYearlyPredictor:
             'day_of_month', 'day_of_week', 'week_of_month', 'month', 'day_of_year',
             'day_sin', 'day_cos', 'month_sin', 'month_cos',
             # Lotto type (1)
-            'lotto_type_hash',
+            'lotto_type_id',
             # Temporal features (27)
             'same_date_type_freq_0', 'same_date_type_freq_1', 'same_date_type_freq_2',
             'same_date_type_freq_3', 'same_date_type_freq_4', 'same_date_type_freq_5',
@@ -1120,8 +1358,82 @@ class MLYearlyPredictor:
                 'month_cos': 1,
             }
     
-    def extract_temporal_pattern_features(self, draws_by_date: Dict[str, Tuple[List[int], str]], 
-                                         target_date: str, target_lotto_type: str = None) -> Dict[str, float]:
+    def extract_date_features_batch(self, draw_dates: List[str]) -> np.ndarray:
+        """
+        extract_date_features for many dates at once.
+        
+        Returns an (N, 9) array whose columns follow DATE_FEATURES. Dates are
+        parsed together as datetime64; if any is not a 'YYYY-MM-DD...' string
+        (or fails to parse) every date goes through extract_date_features.
+        """
+        try:
+            date_strs = [d[:10] for d in draw_dates]
+            if any(len(d) != 10 for d in date_strs):
+                raise ValueError("not a YYYY-MM-DD date")
+            days = np.array(date_strs, dtype='datetime64[D]')
+            if np.isnat(days).any():
+                raise ValueError("not a YYYY-MM-DD date")
+        except (TypeError, ValueError):
+            rows = [[self.extract_date_features(d)[name] for name in self.DATE_FEATURES]
+                    for d in draw_dates]
+            return np.array(rows, dtype=np.float64).reshape(-1, len(self.DATE_FEATURES))
+        
+        months = days.astype('datetime64[M]')
+        day_of_month = (days - months).astype(np.int64) + 1
+        day_of_week = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        week_of_month = (day_of_month - 1) // 7 + 1
+        month = months.astype(np.int64) % 12 + 1
+        day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64) + 1
+        
+        # Cyclical encoding for periodic patterns
+        return np.column_stack([
+            day_of_month, day_of_week, week_of_month, month, day_of_year,
+            np.sin(2 * np.pi * day_of_month / 31),
+            np.cos(2 * np.pi * day_of_month / 31),
+            np.sin(2 * np.pi * month / 12),
+            np.cos(2 * np.pi * month / 12),
+        ]).astype(np.float64)
+    
+    @staticmethod
+    def parse_draw_dates(date_strs) -> Dict[str, datetime]:
+        """Map each distinct 'YYYY-MM-DD...' date string to its datetime; dates that do not parse are left out"""
+        parsed = {}
+        for date_str in date_strs:
+            if date_str in parsed:
+                continue
+            try:
+                parsed[date_str] = datetime.strptime(date_str[:10], '%Y-%m-%d')
+            except (TypeError, ValueError):
+                continue
+        return parsed
+    
+    @classmethod
+    def index_draws_by_date(cls, draws_by_date: Dict[str, List[Tuple[List[int], str]]],
+                            parsed_dates: Dict[str, datetime] = None) -> Tuple[Dict, Dict]:
+        """
+        Group draws by (month, day) and by (month, week of month), keeping
+        their order in draws_by_date; dates that do not parse are left out.
+        
+        parsed_dates is parse_draw_dates(draws_by_date), when the caller
+        already has it.
+        """
+        if parsed_dates is None:
+            parsed_dates = cls.parse_draw_dates(draws_by_date)
+        
+        by_day = {}
+        by_week = {}
+        for date_str, draw_data in _dated_draws(draws_by_date):
+            draw_date = parsed_dates.get(date_str)
+            if draw_date is None:
+                continue
+            draw_week = (draw_date.day - 1) // 7 + 1
+            by_day.setdefault((draw_date.month, draw_date.day), []).append(draw_data)
+            by_week.setdefault((draw_date.month, draw_week), []).append(draw_data)
+        return by_day, by_week
+    
+    def extract_temporal_pattern_features(self, draws_by_date: Dict[str, List[Tuple[List[int], str]]], 
+                                         target_date: str, target_lotto_type: str = None,
+                                         date_index: Tuple[Dict, Dict] = None) -> Dict[str, float]:
         """
         Extract features based on temporal patterns from previous years.
         Prioritizes same-date same-lotto-type matches, but also considers same-date different-lotto-type.
@@ -1129,9 +1441,11 @@ class MLYearlyPredictor:
         Returns a FIXED set of features to ensure consistency (34 features total).
         
         Args:
-            draws_by_date: Dict mapping date_str -> (draw, lotto_type)
+            draws_by_date: Dict mapping date_str -> list of (draw, lotto_type)
             target_date: Date to predict for
             target_lotto_type: Lotto type to predict for (optional)
+            date_index: index_draws_by_date(draws_by_date), when the caller
+                extracts features for many dates of the same draws
         """
         from datetime import datetime
         
@@ -1164,43 +1478,41 @@ class MLYearlyPredictor:
             else:
                 target = target_date
             
+            if date_index is None:
+                date_index = self.index_draws_by_date(draws_by_date)
+            by_day, by_week = date_index
+            
             # Separate draws by lotto type matching
             same_date_same_type_draws = []  # Higher priority
             same_date_diff_type_draws = []  # Lower priority
             
-            for date_str, draw_data in draws_by_date.items():
+            # Same month and day, different year
+            for draw_data in by_day.get((target.month, target.day), ()):
                 try:
-                    draw_date = datetime.strptime(date_str[:10], '%Y-%m-%d')
-                    # Same month and day, different year
-                    if draw_date.month == target.month and draw_date.day == target.day:
-                        if isinstance(draw_data, tuple):
-                            draw, lotto_type = draw_data
-                        else:
-                            draw = draw_data
-                            lotto_type = None
-                        
-                        # Ensure draw is a list of integers
-                        if not isinstance(draw, list):
-                            continue
-                        if not all(isinstance(n, (int, np.integer)) for n in draw):
-                            continue
-                        
-                        if target_lotto_type and lotto_type == target_lotto_type:
-                            same_date_same_type_draws.append(draw)
-                        else:
-                            same_date_diff_type_draws.append(draw)
+                    if isinstance(draw_data, tuple):
+                        draw, lotto_type = draw_data
+                    else:
+                        draw = draw_data
+                        lotto_type = None
+                    
+                    # Ensure draw is a list of integers
+                    if not isinstance(draw, list):
+                        continue
+                    if not all(isinstance(n, (int, np.integer)) for n in draw):
+                        continue
+                    
+                    if target_lotto_type and lotto_type == target_lotto_type:
+                        same_date_same_type_draws.append(draw)
+                    else:
+                        same_date_diff_type_draws.append(draw)
                 except:
                     continue
             
             # Features from same-date same-lotto-type draws (HIGHER PRIORITY)
             if same_date_same_type_draws:
-                all_numbers = [num for draw in same_date_same_type_draws for num in draw if isinstance(num, (int, np.integer))]
-                freq = Counter(all_numbers)
-                
                 # Most common numbers on this date+type across years (up to 10)
-                top_numbers = [n for n, _ in freq.most_common(10)]
-                for i in range(min(10, len(top_numbers))):
-                    features[f'same_date_type_freq_{i}'] = float(freq[top_numbers[i]] / len(same_date_same_type_draws))
+                for i, count in enumerate(_top_counts(same_date_same_type_draws, 10)):
+                    features[f'same_date_type_freq_{i}'] = float(count / len(same_date_same_type_draws))
                 
                 # Average sum on this date+type
                 sums = [float(sum(draw)) for draw in same_date_same_type_draws if all(isinstance(n, (int, np.integer)) for n in draw)]
@@ -1211,13 +1523,9 @@ class MLYearlyPredictor:
             
             # Features from same-date different-lotto-type draws (LOWER PRIORITY, weighted 0.3)
             if same_date_diff_type_draws:
-                all_numbers = [num for draw in same_date_diff_type_draws for num in draw if isinstance(num, (int, np.integer))]
-                freq = Counter(all_numbers)
-                
-                top_numbers = [n for n, _ in freq.most_common(5)]
-                for i in range(min(5, len(top_numbers))):
+                for i, count in enumerate(_top_counts(same_date_diff_type_draws, 5)):
                     # Weighted lower (0.3x) since different lotto type
-                    features[f'same_date_diff_type_freq_{i}'] = float((freq[top_numbers[i]] / len(same_date_diff_type_draws)) * 0.3)
+                    features[f'same_date_diff_type_freq_{i}'] = float((count / len(same_date_diff_type_draws)) * 0.3)
                 
                 sums = [float(sum(draw)) for draw in same_date_diff_type_draws if all(isinstance(n, (int, np.integer)) for n in draw)]
                 if sums:
@@ -1228,41 +1536,32 @@ class MLYearlyPredictor:
             week_diff_type_draws = []
             target_week = (target.day - 1) // 7 + 1
             
-            for date_str, draw_data in draws_by_date.items():
+            for draw_data in by_week.get((target.month, target_week), ()):
                 try:
-                    draw_date = datetime.strptime(date_str[:10], '%Y-%m-%d')
-                    draw_week = (draw_date.day - 1) // 7 + 1
-                    if draw_date.month == target.month and draw_week == target_week:
-                        if isinstance(draw_data, tuple):
-                            draw, lotto_type = draw_data
-                        else:
-                            draw = draw_data
-                            lotto_type = None
-                        
-                        # Ensure draw is valid
-                        if not isinstance(draw, list) or not all(isinstance(n, (int, np.integer)) for n in draw):
-                            continue
-                        
-                        if target_lotto_type and lotto_type == target_lotto_type:
-                            week_same_type_draws.append(draw)
-                        else:
-                            week_diff_type_draws.append(draw)
+                    if isinstance(draw_data, tuple):
+                        draw, lotto_type = draw_data
+                    else:
+                        draw = draw_data
+                        lotto_type = None
+                    
+                    # Ensure draw is valid
+                    if not isinstance(draw, list) or not all(isinstance(n, (int, np.integer)) for n in draw):
+                        continue
+                    
+                    if target_lotto_type and lotto_type == target_lotto_type:
+                        week_same_type_draws.append(draw)
+                    else:
+                        week_diff_type_draws.append(draw)
                 except:
                     continue
             
             if week_same_type_draws:
-                all_numbers = [num for draw in week_same_type_draws for num in draw if isinstance(num, (int, np.integer))]
-                freq = Counter(all_numbers)
-                top_numbers = [n for n, _ in freq.most_common(5)]
-                for i in range(min(5, len(top_numbers))):
-                    features[f'week_type_freq_{i}'] = float(freq[top_numbers[i]] / len(week_same_type_draws))
+                for i, count in enumerate(_top_counts(week_same_type_draws, 5)):
+                    features[f'week_type_freq_{i}'] = float(count / len(week_same_type_draws))
             
             if week_diff_type_draws:
-                all_numbers = [num for draw in week_diff_type_draws for num in draw if isinstance(num, (int, np.integer))]
-                freq = Counter(all_numbers)
-                top_numbers = [n for n, _ in freq.most_common(3)]
-                for i in range(min(3, len(top_numbers))):
-                    features[f'week_diff_type_freq_{i}'] = float((freq[top_numbers[i]] / len(week_diff_type_draws)) * 0.3)
+                for i, count in enumerate(_top_counts(week_diff_type_draws, 3)):
+                    features[f'week_diff_type_freq_{i}'] = float((count / len(week_diff_type_draws)) * 0.3)
             
             # Ensure all values are scalars (convert any arrays/lists to floats)
             for key in features:
@@ -1288,20 +1587,20 @@ class MLYearlyPredictor:
         if not historical_draws:
             return {}
         
-        all_numbers = [num for draw in historical_draws for num in draw]
-        freq = Counter(all_numbers)
+        all_numbers = np.fromiter((num for draw in historical_draws for num in draw), dtype=np.int64)
+        freq = np.bincount(all_numbers, minlength=91)
         total_draws = len(historical_draws)
         
         features = {}
         
         # Overall frequency features
         for num in range(1, 91):
-            features[f'freq_{num}'] = freq.get(num, 0) / total_draws if total_draws > 0 else 0
+            features[f'freq_{num}'] = int(freq[num]) / total_draws
         
-        # Hot/Cold numbers
-        sorted_nums = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-        hot_numbers = [n for n, _ in sorted_nums[:15]]
-        cold_numbers = [n for n, _ in sorted_nums[-15:]] if len(sorted_nums) >= 15 else []
+        # Hot/Cold numbers: by count, ties in order of first appearance
+        sorted_nums = _by_frequency(all_numbers, freq).tolist()
+        hot_numbers = sorted_nums[:15]
+        cold_numbers = sorted_nums[-15:] if len(sorted_nums) >= 15 else []
         
         for i, num in enumerate(hot_numbers):
             features[f'hot_rank_{i}'] = num
@@ -1311,10 +1610,29 @@ class MLYearlyPredictor:
         # If target numbers provided, add their features
         if target_numbers:
             for num in target_numbers:
-                features[f'target_freq_{num}'] = freq.get(num, 0) / total_draws if total_draws > 0 else 0
+                count = int(freq[num]) if 0 <= num < len(freq) else 0
+                features[f'target_freq_{num}'] = count / total_draws
         
         return features
     
+    def _feature_row(self, features: Dict[str, float]) -> np.ndarray:
+        """features as a row in feature_names order; missing or non-numeric values are 0"""
+        row = np.zeros(len(self.feature_names))
+        for col, feature_name in enumerate(self.feature_names):
+            val = features.get(feature_name)
+            # Ensure scalar value
+            if isinstance(val, (list, np.ndarray, tuple)):
+                row[col] = float(val[0]) if len(val) > 0 else 0.0
+            elif isinstance(val, (int, float, np.integer, np.floating)):
+                row[col] = float(val)
+        return row
+    
+    def _lotto_type_id(self, lotto_type) -> int:
+        """Feature id of a lotto type: 0 for none, -1 for one unseen in training"""
+        if not lotto_type:
+            return 0
+        return self._lotto_type_ids.get(lotto_type, -1)
+    
     def prepare_training_data(self, yearly_draws: Dict[int, List[Tuple[str, List[int], str]]]) -> Tuple[np.ndarray, np.ndarray]:
         """
         Prepare training data from previous years' draws.
@@ -1323,10 +1641,8 @@ class MLYearlyPredictor:
         Args:
             yearly_draws: Dict mapping year -> list of (date_str, draw, lotto_type) tuples
         """
-        X_samples = []
-        y_samples = []
-        
-        # Organize draws by date string with lotto type
+        # Organize draws by date string with lotto type; several lotto
+        # types can draw on the same date, so each date keeps a list
         all_draws_by_date = {}
         for year, draws_with_dates in yearly_draws.items():
             for draw_data in draws_with_dates:
@@ -1337,7 +1653,7 @@ class MLYearlyPredictor:
                     lotto_type = None
                 else:
                     continue
-                all_draws_by_date[date_str] = (draw, lotto_type)
+                all_draws_by_date.setdefault(date_str, []).append((draw, lotto_type))
         
         # For each year (except the most recent)
         years = sorted(yearly_draws.keys())
@@ -1347,84 +1663,99 @@ class MLYearlyPredictor:
         # Use all but the last year for training
         training_years = years[:-1]
         
+        # Membership mask of every draw by date (only list draws are counted)
+        draw_types = []
+        dated_draws = [draw_data for _, draw_data in _dated_draws(all_draws_by_date)]
+        draw_members = np.zeros((len(dated_draws), 91), dtype=bool)
+        for i, draw_data in enumerate(dated_draws):
+            if isinstance(draw_data, tuple):
+                d_draw, d_type = draw_data
+            else:
+                d_draw = draw_data
+                d_type = None
+            draw_types.append(d_type)
+            if isinstance(d_draw, list):
+                draw_members[i, [n for n in d_draw if 1 <= n <= 90]] = True
+        
+        # Frequency of every number across all draws, weighted by lotto type
+        # match; it depends only on the lotto type, so build it once per type
+        number_freq_by_type = {}
+        
+        def weighted_number_freq(lotto_type) -> np.ndarray:
+            if lotto_type not in number_freq_by_type:
+                weights = [1.0 if d_type == lotto_type else 0.3 for d_type in draw_types]
+                # Summed down the draws in order, as the per-draw loop did
+                number_freq = (draw_members * np.array(weights)[:, None]).sum(axis=0)
+                total_weight = sum(weights)
+                if total_weight > 0:
+                    number_freq /= total_weight
+                number_freq_by_type[lotto_type] = number_freq
+            return number_freq_by_type[lotto_type]
+        
+        training_draws = []
         for year in training_years:
             for draw_data in yearly_draws[year]:
                 if len(draw_data) == 3:
-                    date_str, draw, lotto_type = draw_data
+                    training_draws.append(draw_data)
                 elif len(draw_data) == 2:
                     date_str, draw = draw_data
-                    lotto_type = None
-                else:
-                    continue
-                
-                # Extract features for this date and lotto type
-                date_features = self.extract_date_features(date_str)
-                temporal_features = self.extract_temporal_pattern_features(all_draws_by_date, date_str, lotto_type)
-                
-                # Add lotto type as feature (encoded as hash for categorical)
-                if lotto_type:
-                    lotto_hash = hash(lotto_type) % 1000  # Normalize to 0-999
-                    date_features['lotto_type_hash'] = lotto_hash
-                else:
-                    date_features['lotto_type_hash'] = 0
-                
-                # Combine features in fixed order
-                combined_features = {**date_features, **temporal_features}
-                
-                # For each number in the draw, create a training sample
-                # We'll predict which numbers are likely to appear
-                for num in range(1, 91):
-                    # Feature: is this number in the actual draw?
-                    target = 1 if num in draw else 0
-                    
-                    # Add number-specific features
-                    num_features = combined_features.copy()
-                    num_features['number'] = float(num)  # Ensure scalar
-                    # Calculate frequency across all draws (weighted by lotto type match)
-                    number_freq = 0.0
-                    total_weight = 0.0
-                    for d, draw_data in all_draws_by_date.items():
-                        if isinstance(draw_data, tuple):
-                            d_draw, d_type = draw_data
-                        else:
-                            d_draw = draw_data
-                            d_type = None
-                        
-                        weight = 1.0 if d_type == lotto_type else 0.3
-                        if isinstance(d_draw, list) and num in d_draw:
-                            number_freq += weight
-                        total_weight += weight
-                    num_features['number_freq'] = float(number_freq / total_weight if total_weight > 0 else 0.0)
-                    
-                    # Build feature vector in fixed order, ensuring all values are scalars
-                    feature_vector = []
-                    for feature_name in self.feature_names:
-                        if feature_name in num_features:
-                            val = num_features[feature_name]
-                            # Ensure scalar value
-                            if isinstance(val, (list, np.ndarray, tuple)):
-                                feature_vector.append(float(val[0]) if len(val) > 0 else 0.0)
-                            elif isinstance(val, (int, np.integer)):
-                                feature_vector.append(float(val))
-                            elif isinstance(val, (float, np.floating)):
-                                feature_vector.append(float(val))
-                            else:
-                                feature_vector.append(0.0)
-                        else:
-                            feature_vector.append(0.0)
-                    
-                    # Validate feature vector length
-                    if len(feature_vector) == len(self.feature_names):
-                        X_samples.append(feature_vector)
-                        y_samples.append(target)
+                    training_draws.append((date_str, draw, None))
+        
+        # Lotto types are numbered in sorted order, so the same training data
+        # always gives the same ids (unlike the per-process salted hash())
+        lotto_types = sorted({lotto_type for _, _, lotto_type in training_draws if lotto_type})
+        self._lotto_type_ids = {lotto_type: i for i, lotto_type in enumerate(lotto_types, 1)}
+        
+        # Date features of every training draw, parsed in one batch
+        date_rows = self.extract_date_features_batch([date_str for date_str, _, _ in training_draws])
+        
+        # Temporal features depend only on the date's month and day and the
+        # lotto type, so each such key is extracted (as a feature row) once
+        temporal_by_key = {}
+        # Every date is parsed once, up front; the index and the cache keys
+        # below reuse the parsed dates
+        parsed_dates = self.parse_draw_dates(all_draws_by_date)
+        date_index = self.index_draws_by_date(all_draws_by_date, parsed_dates)
         
-        if not X_samples:
+        if not training_draws:
             return np.array([]), np.array([])
         
-        # Convert to numpy array, ensuring all values are numeric scalars
+        # Per training draw: feature row, number frequencies, membership mask,
+        # written in place. The trees work in float32 anyway, so the
+        # training matrix is built in float32 rather than converted in fit
+        date_cols = [self.feature_names.index(name) for name in self.DATE_FEATURES]
+        type_col = self.feature_names.index('lotto_type_id')
+        base_rows = np.empty((len(training_draws), len(self.feature_names)), dtype=np.float32)
+        freq_rows = np.empty((len(training_draws), 91))
+        in_draw = np.zeros((len(training_draws), 91), dtype=np.int8)
+        
+        for i, ((date_str, draw, lotto_type), date_row) in enumerate(zip(training_draws, date_rows)):
+            # Extract features for this date and lotto type
+            draw_date = parsed_dates.get(date_str)
+            key = (draw_date.month, draw_date.day, lotto_type) if draw_date is not None else None
+            if key in temporal_by_key:
+                temporal_row = temporal_by_key[key]
+            else:
+                temporal_row = self._feature_row(self.extract_temporal_pattern_features(
+                    all_draws_by_date, draw_date if draw_date is not None else date_str, lotto_type,
+                    date_index))
+                if key is not None:
+                    temporal_by_key[key] = temporal_row
+            
+            # Feature row in fixed order; the number columns are filled in
+            # per number below
+            base_rows[i] = temporal_row
+            base_rows[i, date_cols] = date_row
+            # Add lotto type as feature (encoded as a stable id for categorical)
+            base_rows[i, type_col] = self._lotto_type_id(lotto_type)
+            freq_rows[i] = weighted_number_freq(lotto_type)
+            in_draw[i, [n for n in draw if 1 <= n <= 90]] = 1
+        
+        # One training sample per number of every draw: is this number in
+        # the actual draw? We'll predict which numbers are likely to appear
         try:
-            X = np.array(X_samples, dtype=np.float64)
-            y = np.array(y_samples, dtype=np.int32)
+            X, y = number_samples(base_rows, freq_rows, in_draw, self.feature_names.index('number'),
+                                  self.feature_names.index('number_freq'))
             
             # Validate shape consistency
             if len(X) == 0 or X.shape[1] != len(self.feature_names):
@@ -1444,6 +1775,14 @@ class MLYearlyPredictor:
         Uses RandomForest + GradientBoosting for better accuracy.
         """
         try:
+            model_path = None
+            if self.model_dir:
+                model_path = os.path.join(self.model_dir,
+                                          self.SAVED_MODEL_PATTERN.replace('*', self._fingerprint(yearly_draws)))
+                if os.path.exists(model_path) and self.load(model_path):
+                    print(f"✅ Loaded yearly ML models from {model_path}")
+                    return True
+            
             print("Training ensemble ML models on yearly patterns...")
             
             X, y = self.prepare_training_data(yearly_draws)
@@ -1459,59 +1798,61 @@ class MLYearlyPredictor:
                 # Pad or truncate features to match expected count
                 if X.shape[1] < expected_features:
                     # Pad with zeros
-                    padding = np.zeros((X.shape[0], expected_features - X.shape[1]))
+                    padding = np.zeros((X.shape[0], expected_features - X.shape[1]), dtype=X.dtype)
                     X = np.hstack([X, padding])
                 elif X.shape[1] > expected_features:
                     # Truncate to expected count
                     X = X[:, :expected_features]
             
-            # Scale features
-            X_scaled = self.feature_scaler.fit_transform(X)
+            # Features are used unscaled: tree splits do not depend on feature scale
             
             # Train ensemble of models for better accuracy
             print(f"  Training on {len(X)} samples with {X.shape[1]} features (expected {expected_features})...")
             
-            # Model 1: RandomForest (good for non-linear patterns and feature importance)
-            self.models['rf'] = RandomForestClassifier(
-                n_estimators=200,  # Increased for better accuracy
-                max_depth=25,  # Deeper trees for complex patterns
+            # Model 1: RandomForest (good for non-linear patterns and feature importance).
+            # Forest size scales with the data: up to 200 trees of depth 25
+            n_estimators = self.n_estimators or min(200, max(50, len(X) // 200))
+            max_depth = self.max_depth or min(25, int(np.log2(len(X))) + 3)
+            rf = RandomForestClassifier(
+                n_estimators=n_estimators,
+                max_depth=max_depth,
                 min_samples_split=8,  # More splits
                 min_samples_leaf=4,
                 max_features='sqrt',  # Feature subsampling
+                max_samples=0.7,  # Each tree bootstraps 70% of the rows
                 random_state=42,
                 n_jobs=-1,
                 verbose=0,
                 class_weight='balanced'  # Handle imbalanced data (most numbers don't appear)
             )
-            self.models['rf'].fit(X_scaled, y)
-            print("  ✅ RandomForest trained")
             
-            # Model 2: GradientBoosting (good for sequential learning)
-            self.models['gb'] = GradientBoostingClassifier(
-                n_estimators=150,
+            # Model 2: GradientBoosting (good for sequential learning).
+            # The histogram variant bins features and builds trees in
+            # parallel, so it scales to tens of thousands of samples
+            gb = HistGradientBoostingClassifier(
+                max_iter=150,
                 max_depth=8,
                 learning_rate=0.1,
-                min_samples_split=10,
+                l2_regularization=0.0,
                 min_samples_leaf=5,
+                early_stopping=True,
                 random_state=42,
                 verbose=0
             )
-            self.models['gb'].fit(X_scaled, y)
-            print("  ✅ GradientBoosting trained")
             
-            # Create ensemble classifier that combines both models
-            class EnsembleClassifier:
-                def __init__(self, rf_model, gb_model):
-                    self.rf = rf_model
-                    self.gb = gb_model
-                
-                def predict_proba(self, X):
-                    # Weighted average: RF 60%, GB 40% (RF generally more stable)
-                    rf_proba = self.rf.predict_proba(X)
-                    gb_proba = self.gb.predict_proba(X)
-                    return 0.6 * rf_proba + 0.4 * gb_proba
-            
-            self.models['number_classifier'] = EnsembleClassifier(self.models['rf'], self.models['gb'])
+            # Soft-voting ensemble of both models: RF 60%, GB 40% (RF
+            # generally more stable). The two models are fitted in parallel
+            self.models['number_classifier'] = VotingClassifier(
+                estimators=[('rf', rf), ('gb', gb)],
+                voting='soft',
+                weights=[0.6, 0.4],
+                n_jobs=-1
+            )
+            self.models['number_classifier'].fit(X, y)
+            self.models['rf'] = self.models['number_classifier'].named_estimators_['rf']
+            self.models['gb'] = self.models['number_classifier'].named_estimators_['gb']
+            print("  ✅ RandomForest trained")
+            print("  ✅ GradientBoosting trained")
             
             # Get feature importance from RandomForest (most interpretable)
             # Use the fixed feature names
@@ -1525,10 +1866,12 @@ class MLYearlyPredictor:
             self.feature_importance = dict(zip(feature_names_for_importance, importances))
             
             print(f"✅ Ensemble ML models trained on {len(X)} samples")
-            top_features = sorted(self.feature_importance.items(), key=lambda x: x[1], reverse=True)[:5]
+            top_features = heapq.nlargest(5, self.feature_importance.items(), key=lambda x: x[1])
             print(f"   Top features: {top_features}")
             
             self.trained = True
+            if model_path:
+                self.save(model_path)
             return True
             
         except Exception as e:
@@ -1537,8 +1880,96 @@ class MLYearlyPredictor:
             traceback.print_exc()
             return False
     
+    def _fingerprint(self, yearly_draws: Dict[int, List[Tuple[str, List[int], str]]]) -> str:
+        """Digest of everything a trained model depends on: the draws, the settings and the sklearn version"""
+        key = repr((sorted(yearly_draws.items()), self.feature_names, self.n_estimators, self.max_depth,
+                    sklearn.__version__))
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+    
+    def save(self, path: str) -> bool:
+        """
+        Write the trained models to path (uncompressed, so load can memory-map
+        them), then prune older saved models beside it down to KEEP_SAVED_MODELS.
+        """
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            joblib.dump({
+                'models': self.models,
+                'lotto_type_ids': self._lotto_type_ids,
+                'feature_names': self.feature_names,
+                'feature_importance': self.feature_importance,
+            }, tmp_path)
+            os.replace(tmp_path, path)  # Readers never see a partly written file
+        except Exception as e:
+            print(f"⚠️ Could not save yearly ML models to {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        self._prune_saved_models(path)
+        return True
+    
+    def _prune_saved_models(self, keep_path: str) -> None:
+        """Delete all but the KEEP_SAVED_MODELS newest saved models in keep_path's directory"""
+        saved = []
+        for path in glob.glob(os.path.join(os.path.dirname(keep_path) or '.', self.SAVED_MODEL_PATTERN)):
+            try:
+                saved.append((os.path.getmtime(path), path))
+            except OSError:
+                continue  # Removed by another worker meanwhile
+        saved.sort(reverse=True)
+        for _, path in saved[self.KEEP_SAVED_MODELS:]:
+            if os.path.abspath(path) == os.path.abspath(keep_path):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def load(self, path: str) -> bool:
+        """Restore models written by save; their tree arrays are memory-mapped"""
+        try:
+            saved = joblib.load(path, mmap_mode='r')
+            if saved['feature_names'] != self.feature_names:
+                return False
+            self.models = saved['models']
+            self._lotto_type_ids = saved['lotto_type_ids']
+            self.feature_importance = saved['feature_importance']
+            self.trained = True
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not load yearly ML models from {path}: {e}")
+            return False
+    
+    @staticmethod
+    def _weighted_top5(historical_draws_by_date: Dict[str, List[Tuple[List[int], str]]],
+                       target_lotto_type: str = None) -> List[int]:
+        """
+        Five most frequent numbers, sorted, counting draws of another lotto
+        type at 0.3; ties go to the number that appeared first.
+        """
+        nums = []
+        weights = []
+        for _, draw_data in _dated_draws(historical_draws_by_date):
+            if isinstance(draw_data, tuple):
+                draw, lotto_type = draw_data
+                weight = 1.0 if lotto_type == target_lotto_type else 0.3
+            else:
+                draw = draw_data
+                weight = 1.0
+            nums.extend(draw)
+            weights.extend([weight] * len(draw))
+        if not nums:
+            return []
+        
+        nums = np.array(nums, dtype=np.int64)
+        freq = np.bincount(nums, weights=weights, minlength=91)
+        return sorted(_by_frequency(nums, freq)[:5].tolist())
+    
     def predict_numbers_for_date(self, target_date: str, 
-                                 historical_draws_by_date: Dict[str, Tuple[List[int], str]],
+                                 historical_draws_by_date: Dict[str, List[Tuple[List[int], str]]],
                                  historical_draws: List[List[int]],
                                  target_lotto_type: str = None) -> List[int]:
         """
@@ -1546,23 +1977,13 @@ class MLYearlyPredictor:
         
         Args:
             target_date: Date to predict for
-            historical_draws_by_date: Dict mapping date_str -> (draw, lotto_type)
+            historical_draws_by_date: Dict mapping date_str -> list of (draw, lotto_type)
             historical_draws: List of all historical draws
             target_lotto_type: Lotto type to predict for (optional)
         """
         if not self.trained or 'number_classifier' not in self.models:
             # Fallback to frequency-based (weighted by lotto type if provided)
-            freq = Counter()
-            for draw_data in historical_draws_by_date.values():
-                if isinstance(draw_data, tuple):
-                    draw, lotto_type = draw_data
-                    weight = 1.0 if lotto_type == target_lotto_type else 0.3
-                else:
-                    draw = draw_data
-                    weight = 1.0
-                for num in draw:
-                    freq[num] += weight
-            return sorted([n for n, _ in freq.most_common(5)])
+            return self._weighted_top5(historical_draws_by_date, target_lotto_type)
         
         try:
             # Extract features for target date and lotto type
@@ -1574,101 +1995,60 @@ class MLYearlyPredictor:
             )
             
             # Add lotto type as feature
-            if target_lotto_type:
-                lotto_hash = hash(target_lotto_type) % 1000
-                date_features['lotto_type_hash'] = lotto_hash
-            else:
-                date_features['lotto_type_hash'] = 0
-            
-            # Score each number (1-90)
-            number_scores = {}
+            date_features['lotto_type_id'] = self._lotto_type_id(target_lotto_type)
             
-            for num in range(1, 91):
-                # Combine features
-                combined_features = {**date_features, **temporal_features}
-                combined_features['number'] = num
-                
-                # Calculate weighted frequency (prioritize same lotto type)
-                number_freq = 0
-                total_weight = 0
-                for draw_data in historical_draws_by_date.values():
-                    if isinstance(draw_data, tuple):
-                        draw, lotto_type = draw_data
-                        weight = 1.0 if lotto_type == target_lotto_type else 0.3
-                    else:
-                        draw = draw_data
-                        weight = 1.0
-                    
-                    if num in draw:
-                        number_freq += weight
-                    total_weight += weight
-                
-                combined_features['number_freq'] = number_freq / total_weight if total_weight > 0 else 0
-                
-                # Prepare feature vector in fixed order (must match training feature order)
-                feature_vector = []
-                for feature_name in self.feature_names:
-                    if feature_name in combined_features:
-                        val = combined_features[feature_name]
-                        # Ensure scalar value
-                        if isinstance(val, (list, np.ndarray, tuple)):
-                            feature_vector.append(float(val[0]) if len(val) > 0 else 0.0)
-                        elif isinstance(val, (int, np.integer)):
-                            feature_vector.append(float(val))
-                        elif isinstance(val, (float, np.floating)):
-                            feature_vector.append(float(val))
-                        else:
-                            feature_vector.append(0.0)
-                    else:
-                        feature_vector.append(0.0)
-                
-                # Ensure correct shape
-                if len(feature_vector) != len(self.feature_names):
-                    print(f"Warning: Feature vector length mismatch. Expected {len(self.feature_names)}, got {len(feature_vector)}")
-                    # Pad or truncate
-                    if len(feature_vector) < len(self.feature_names):
-                        feature_vector.extend([0.0] * (len(self.feature_names) - len(feature_vector)))
-                    else:
-                        feature_vector = feature_vector[:len(self.feature_names)]
-                
-                feature_vector_array = np.array([feature_vector], dtype=np.float64)
-                
-                # Validate feature count matches scaler expectation
-                if feature_vector_array.shape[1] != self.feature_scaler.n_features_in_:
-                    print(f"Warning: Feature count mismatch during prediction. Scaler expects {self.feature_scaler.n_features_in_}, got {feature_vector_array.shape[1]}")
-                    # Adjust to match scaler
-                    if feature_vector_array.shape[1] < self.feature_scaler.n_features_in_:
-                        padding = np.zeros((1, self.feature_scaler.n_features_in_ - feature_vector_array.shape[1]))
-                        feature_vector_array = np.hstack([feature_vector_array, padding])
-                    elif feature_vector_array.shape[1] > self.feature_scaler.n_features_in_:
-                        feature_vector_array = feature_vector_array[:, :self.feature_scaler.n_features_in_]
-                
-                feature_vector_scaled = self.feature_scaler.transform(feature_vector_array)
+            # Weighted frequency of every number (prioritize same lotto type)
+            number_freq = np.zeros(91)
+            total_weight = 0
+            for _, draw_data in _dated_draws(historical_draws_by_date):
+                if isinstance(draw_data, tuple):
+                    draw, lotto_type = draw_data
+                    weight = 1.0 if lotto_type == target_lotto_type else 0.3
+                else:
+                    draw = draw_data
+                    weight = 1.0
                 
-                # Predict probability this number appears
-                prob = self.models['number_classifier'].predict_proba(feature_vector_scaled)[0][1]
-                number_scores[num] = prob
+                for num in set(draw):
+                    if 1 <= num <= 90:
+                        number_freq[num] += weight
+                total_weight += weight
+            if total_weight > 0:
+                number_freq /= total_weight
             
-            # Select top 5 numbers by probability
-            top_numbers = sorted(number_scores.items(), key=lambda x: x[1], reverse=True)[:5]
-            return sorted([n for n, _ in top_numbers])
+            # Feature matrix, one row per number 1-90, in the fixed training
+            # order; only 'number' and 'number_freq' vary between rows
+            base_row = self._feature_row({**date_features, **temporal_features}).astype(np.float32)
+            feature_matrix, _ = number_samples(base_row[None], number_freq[None], np.zeros((1, 91), dtype=np.int8),
+                                               self.feature_names.index('number'),
+                                               self.feature_names.index('number_freq'))
+            
+            # Validate feature count matches the trained models
+            n_features = self.models['rf'].n_features_in_
+            if feature_matrix.shape[1] != n_features:
+                print(f"Warning: Feature count mismatch during prediction. Model expects {n_features}, got {feature_matrix.shape[1]}")
+                # Adjust to match the models
+                if feature_matrix.shape[1] < n_features:
+                    padding = np.zeros((90, n_features - feature_matrix.shape[1]), dtype=feature_matrix.dtype)
+                    feature_matrix = np.hstack([feature_matrix, padding])
+                else:
+                    feature_matrix = feature_matrix[:, :n_features]
+            
+            # Probability of each number appearing, in one model call
+            probs = self.models['number_classifier'].predict_proba(feature_matrix)[:, 1]
+            
+            # Select top 5 numbers by probability (ties keep the lower number):
+            # partition out the candidates at or above the 5th-best
+            # probability, then order only those
+            candidates = np.flatnonzero(probs >= np.partition(probs, len(probs) - 5)[len(probs) - 5])
+            top_numbers = candidates[np.argsort(-probs[candidates], kind='stable')[:5]] + 1
+            return sorted(top_numbers.tolist())
             
         except Exception as e:
             print(f"ML prediction failed: {e}, using fallback")
             import traceback
             traceback.print_exc()
             # Fallback (weighted by lotto type)
-            freq = Counter()
-            for draw_data in historical_draws_by_date.values():
-                if isinstance(draw_data, tuple):
-                    draw, lotto_type = draw_data
-                    weight = 1.0 if lotto_type == target_lotto_type else 0.3
-                else:
-                    draw = draw_data
-                    weight = 1.0
-                for num in draw:
-                    freq[num] += weight
-            return sorted([n for n, _ in freq.most_common(5)])
+            return self._weighted_top5(historical_draws_by_date, target_lotto_type)
 
 
 # ============================================================================
@@ -2135,12 +2515,26 @@ class YearlyPatternAnalyzer:
     """
 
     def __init__(self):
-        self.yearly_data = {}  # year -> list of draws
+        self.yearly_data = {}  # year -> Draws (list of draws with a packed array form)
         self.yearly_data_with_dates = {}  # year -> list of (date_str, draw) tuples
+        # Every year's draws by date (date -> list of (draw, lotto_type)) and
+        # as one flat list, for the ML predictor; rebuilt by organize_by_year
+        self._all_draws_by_date = {}
+        self._all_historical_draws = []
+        self._sorted_years = ()  # years of yearly_data in ascending order
         self.yearly_frequencies = {}  # year -> {number: count}
         self.yearly_hot_numbers = {}  # year -> list of hot numbers
         self.yearly_cold_numbers = {}  # year -> list of cold numbers
+        self._year_totals = {}  # year -> number of draws, set with the frequencies
+        # Count and appearance rate (count / draws) of every number in every
+        # year, rows in year order; column 0 is unused
+        self.yearly_counts = np.zeros((0, 91), dtype=np.int64)
+        self.yearly_rates = np.zeros((0, 91))
         self.cross_year_patterns = []
+        # Recurring-hot and stable numbers found by detect_cross_year_patterns,
+        # reused by get_yearly_summary; None until detected for the current data
+        self._recurring_hot_cache = None
+        self._stable_cache = None
         self.min_draws_for_analysis = 10  # Minimum draws needed for reliable analysis
         self.ml_predictor = MLYearlyPredictor()  # ML-based predictor
 
@@ -2155,6 +2549,8 @@ class YearlyPatternAnalyzer:
         # Clear previous data
         self.yearly_data = {}
         self.yearly_data_with_dates = {}
+        self._recurring_hot_cache = None
+        self._stable_cache = None
         
         if draw_dates and len(draw_dates) == len(draws):
             # Organize by actual dates
@@ -2216,21 +2612,59 @@ class YearlyPatternAnalyzer:
             ] if draws else []
             print(f"Warning: No yearly data organized, using all {len(draws)} draws for {current_year}")
         
-        print(f"Yearly data organized: {[(year, len(data)) for year, data in sorted(self.yearly_data.items())]}")
+        # Each year's draws pack once into a contiguous (n, 5) array for the
+        # frequency counts
+        self.yearly_data = {year: Draws(year_draws) for year, year_draws in self.yearly_data.items()}
+        self._sorted_years = tuple(sorted(self.yearly_data))
+        
+        # Historical draws by date with lotto types for the ML predictor
+        self._all_draws_by_date = {}
+        self._all_historical_draws = []
+        for year, draws_with_dates in self.yearly_data_with_dates.items():
+            for draw_data in draws_with_dates:
+                if len(draw_data) == 3:
+                    date_str, draw, lotto_type = draw_data
+                elif len(draw_data) == 2:
+                    date_str, draw = draw_data
+                    lotto_type = None
+                else:
+                    continue
+                self._all_draws_by_date.setdefault(date_str, []).append((draw, lotto_type))
+                self._all_historical_draws.append(draw)
+        
+        print(f"Yearly data organized: {[(year, len(self.yearly_data[year])) for year in self._sorted_years]}")
         return self.yearly_data
 
     def calculate_yearly_frequencies(self) -> Dict[int, Dict[int, int]]:
         """Calculate number frequencies for each year"""
+        self._recurring_hot_cache = None
+        self._stable_cache = None
+        self._year_totals = {year: len(draws) for year, draws in self.yearly_data.items()}
         for year, draws in self.yearly_data.items():
-            freq = Counter()
-            for draw in draws:
-                freq.update(draw)
-            self.yearly_frequencies[year] = dict(freq)
+            arr = _draws_to_array(draws)
+            if len(arr) == len(draws):
+                numbers = arr.ravel()
+            else:  # Some draws are not 5 numbers; count them all, in order
+                numbers = np.fromiter((n for draw in draws for n in draw), dtype=np.int64)
+            counts = np.bincount(numbers, minlength=91)
+            
+            # Numbers by count, ties in order of first appearance; every
+            # number listed appeared at least once
+            sorted_nums = _by_frequency(numbers, counts).tolist()
+            self.yearly_frequencies[year] = dict(zip(sorted_nums, counts[sorted_nums].tolist()))
             
             # Calculate hot and cold numbers for each year
-            sorted_nums = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-            self.yearly_hot_numbers[year] = [n for n, _ in sorted_nums[:15]]
-            self.yearly_cold_numbers[year] = [n for n, _ in sorted_nums[-15:] if freq[n] > 0]
+            self.yearly_hot_numbers[year] = sorted_nums[:15]
+            self.yearly_cold_numbers[year] = sorted_nums[-15:]
+        
+        years = self._sorted_years
+        self.yearly_counts = np.zeros((len(years), 91), dtype=np.int64)
+        for row, year in enumerate(years):
+            for num, count in self.yearly_frequencies[year].items():
+                if 1 <= num <= 90:
+                    self.yearly_counts[row, num] = count
+        totals = np.array([self._year_totals[year] for year in years]).reshape(-1, 1)
+        self.yearly_rates = np.divide(self.yearly_counts, totals, out=np.zeros((len(years), 91)), where=totals > 0)
         
         return self.yearly_frequencies
 
@@ -2240,7 +2674,7 @@ class YearlyPatternAnalyzer:
         Uses Law of Large Numbers: as sample size grows, patterns stabilize.
         """
         patterns = []
-        years = sorted(self.yearly_data.keys())
+        years = self._sorted_years
         
         if len(years) < 2:
             # With only one year, create patterns based on that year's data
@@ -2260,6 +2694,7 @@ class YearlyPatternAnalyzer:
         # Pattern 1: Recurring Hot Numbers
         # Numbers that are consistently hot across multiple years
         recurring_hot = self._find_recurring_numbers(self.yearly_hot_numbers, min_years=2)
+        self._recurring_hot_cache = recurring_hot
         if recurring_hot:
             patterns.append({
                 'type': 'recurring_hot',
@@ -2304,6 +2739,7 @@ class YearlyPatternAnalyzer:
         # Pattern 5: Stable Foundation Numbers
         # Numbers that consistently appear across all years (foundation of the system)
         stable = self._find_stable_numbers()
+        self._stable_cache = stable
         if stable:
             patterns.append({
                 'type': 'stable_foundation',
@@ -2327,11 +2763,11 @@ class YearlyPatternAnalyzer:
         
         # Return numbers appearing in at least min_years
         recurring = [num for num, count in number_year_count.items() if count >= min_years]
-        return sorted(recurring, key=lambda x: number_year_count[x], reverse=True)[:10]
+        return heapq.nlargest(10, recurring, key=lambda x: number_year_count[x])
 
     def _detect_cold_to_hot_transitions(self) -> List[int]:
         """Detect numbers transitioning from cold to hot"""
-        years = sorted(self.yearly_data.keys())
+        years = self._sorted_years
         if len(years) < 2:
             return []
         
@@ -2339,102 +2775,56 @@ class YearlyPatternAnalyzer:
         curr_year = years[-1]
         
         # Numbers that were cold last year
-        prev_cold = set(self.yearly_cold_numbers.get(prev_year, []))
-        
-        # Check if any are becoming hot this year
-        curr_freq = self.yearly_frequencies.get(curr_year, {})
+        prev_cold = np.zeros(91, dtype=bool)
+        prev_cold[[n for n in self.yearly_cold_numbers.get(prev_year, []) if 1 <= n <= 90]] = True
         
-        transitioning = []
-        for num in prev_cold:
-            if curr_freq.get(num, 0) > len(self.yearly_data.get(curr_year, [])) * 0.1:
-                transitioning.append(num)
+        # Check if any are becoming hot this year (rows are in year order)
+        threshold = self._year_totals.get(curr_year, 0) * 0.1
+        transitioning = np.flatnonzero(prev_cold & (self.yearly_counts[-1] > threshold))
         
-        return transitioning[:5]
+        return transitioning[:5].tolist()
 
     def _detect_cyclical_patterns(self) -> List[int]:
         """Detect numbers with cyclical appearance patterns"""
-        years = sorted(self.yearly_data.keys())
+        years = self._sorted_years
         if len(years) < 3:
             return []
         
-        cyclical_numbers = []
+        # Check for alternating pattern (high-low-high or low-high-low) in
+        # every window of three consecutive years
+        is_cyclical, _ = rate_patterns(self.yearly_rates)
         
-        for num in range(1, 91):
-            appearances = []
-            for year in years:
-                freq = self.yearly_frequencies.get(year, {}).get(num, 0)
-                total = len(self.yearly_data.get(year, []))
-                rate = freq / total if total > 0 else 0
-                appearances.append(rate)
-            
-            # Check for alternating pattern (high-low-high or low-high-low)
-            if len(appearances) >= 3:
-                is_cyclical = True
-                for i in range(len(appearances) - 2):
-                    if not ((appearances[i] > appearances[i+1] and appearances[i+1] < appearances[i+2]) or
-                            (appearances[i] < appearances[i+1] and appearances[i+1] > appearances[i+2])):
-                        is_cyclical = False
-                        break
-                
-                if is_cyclical:
-                    cyclical_numbers.append(num)
-        
-        return cyclical_numbers[:5]
+        return (np.flatnonzero(is_cyclical[1:])[:5] + 1).tolist()
 
     def _detect_frequency_trends(self) -> List[int]:
         """Detect numbers with increasing frequency trend"""
-        years = sorted(self.yearly_data.keys())
+        years = self._sorted_years
         if len(years) < 2:
             return []
         
-        trending = []
-        
-        for num in range(1, 91):
-            rates = []
-            for year in years:
-                freq = self.yearly_frequencies.get(year, {}).get(num, 0)
-                total = len(self.yearly_data.get(year, []))
-                rate = freq / total if total > 0 else 0
-                rates.append(rate)
-            
-            # Check for upward trend
-            if len(rates) >= 2:
-                # Simple trend: each year higher than previous
-                is_trending = all(rates[i] <= rates[i+1] for i in range(len(rates)-1))
-                # Or significant increase in last year
-                if not is_trending and len(rates) >= 2:
-                    is_trending = rates[-1] > rates[-2] * 1.3  # 30% increase
-                
-                if is_trending and rates[-1] > 0.05:  # At least 5% appearance rate
-                    trending.append((num, rates[-1]))
+        rates = self.yearly_rates[:, 1:]
+        # Simple trend: each year higher than previous, or a significant
+        # (30%) increase in the last year
+        _, is_trending = rate_patterns(rates)
+        is_trending &= rates[-1] > 0.05  # At least 5% appearance rate
         
         # Sort by current rate
-        trending.sort(key=lambda x: x[1], reverse=True)
-        return [num for num, _ in trending[:10]]
+        trending = np.flatnonzero(is_trending)
+        trending = trending[np.argsort(-rates[-1, trending], kind='stable')]
+        return (trending[:10] + 1).tolist()
 
     def _find_stable_numbers(self) -> List[int]:
         """Find numbers that consistently appear across all years"""
-        years = sorted(self.yearly_data.keys())
+        years = self._sorted_years
         if len(years) < 2:
             return []
         
-        stable = []
+        # Years in which each number appears in at least 3% of draws
+        appearances = (self.yearly_rates[:, 1:] > 0.03).sum(axis=0)
         
-        for num in range(1, 91):
-            appearances = 0
-            total_years = len(years)
-            
-            for year in years:
-                freq = self.yearly_frequencies.get(year, {}).get(num, 0)
-                total = len(self.yearly_data.get(year, []))
-                if total > 0 and freq / total > 0.03:  # Appears in at least 3% of draws
-                    appearances += 1
-            
-            # Must appear consistently in most years
-            if appearances >= total_years * 0.8:
-                stable.append(num)
-        
-        return stable[:10]
+        # Must appear consistently in most years
+        stable = np.flatnonzero(appearances >= len(years) * 0.8)
+        return (stable[:10] + 1).tolist()
 
     def predict_with_yearly_patterns(self, current_year_draws: List[List[int]], 
                                       num_predictions: int = 5,
@@ -2455,21 +2845,6 @@ class YearlyPatternAnalyzer:
         if target_date is None:
             target_date = datetime.now().strftime('%Y-%m-%d')
         
-        # Build historical draws by date with lotto types for ML predictor
-        all_draws_by_date = {}
-        all_historical_draws = []
-        for year, draws_with_dates in self.yearly_data_with_dates.items():
-            for draw_data in draws_with_dates:
-                if len(draw_data) == 3:
-                    date_str, draw, lotto_type = draw_data
-                elif len(draw_data) == 2:
-                    date_str, draw = draw_data
-                    lotto_type = None
-                else:
-                    continue
-                all_draws_by_date[date_str] = (draw, lotto_type)
-                all_historical_draws.append(draw)
-        
         # Try ML prediction first if trained
         ml_prediction = None
         if ml_trained and self.ml_predictor.trained:
@@ -2477,8 +2852,8 @@ class YearlyPatternAnalyzer:
                 print(f"Using ML prediction for date: {target_date}, lotto_type: {target_lotto_type}")
                 ml_prediction = self.ml_predictor.predict_numbers_for_date(
                     target_date,
-                    all_draws_by_date,
-                    all_historical_draws,
+                    self._all_draws_by_date,
+                    self._all_historical_draws,
                     target_lotto_type
                 )
                 if ml_prediction and len(ml_prediction) == 5:
@@ -2555,15 +2930,21 @@ class YearlyPatternAnalyzer:
             })
             num_predictions -= 1  # One prediction already added
         
+        # Weight by position (higher ranked = more likely): the k-th remaining
+        # candidate weighs 1 / (k + 1); cumulated once for every pick
+        rank_cum_weights = np.cumsum(1 / np.arange(1, 91)).tolist()
+        
+        # Numbers already given in a prediction
+        all_used = set()
+        for p in predictions:
+            all_used.update(p.get('numbers', []))
+        
         for i in range(num_predictions):
-            # Select top candidates
-            candidates = [n for n, w in sorted_numbers[:30] if n not in [p.get('numbers', []) for p in predictions]]
+            # Select top candidates not used by an earlier prediction
+            candidates = [n for n, w in sorted_numbers[:30] if n not in all_used]
             
             # If not enough candidates, add random numbers from 1-90
             if len(candidates) < 5:
-                all_used = set()
-                for p in predictions:
-                    all_used.update(p.get('numbers', []))
                 remaining_nums = [n for n in range(1, 91) if n not in all_used and n not in candidates]
                 candidates.extend(remaining_nums[:5 - len(candidates)])
             
@@ -2576,11 +2957,8 @@ class YearlyPatternAnalyzer:
                     if not remaining:
                         break
                     
-                    # Weight by position (higher ranked = more likely)
-                    weights = [1 / (k + 1) for k in range(len(remaining))]
-                    chosen = random.choices(remaining, weights=weights)[0]
-                    prediction_numbers.append(chosen)
-                    remaining.remove(chosen)
+                    k = random.choices(range(len(remaining)), cum_weights=rank_cum_weights[:len(remaining)])[0]
+                    prediction_numbers.append(remaining.pop(k))
                 
                 prediction_numbers = sorted(prediction_numbers)
                 
@@ -2588,6 +2966,7 @@ class YearlyPatternAnalyzer:
                 data_confidence = min(len(current_year_draws) / 50, 1.0)  # Max confidence at 50+ draws
                 pattern_confidence = sum(p['confidence'] for p in self.cross_year_patterns) / max(len(self.cross_year_patterns), 1)
                 
+                all_used.update(prediction_numbers)
                 predictions.append({
                     'numbers': prediction_numbers,
                     'confidence': (data_confidence * 0.4 + pattern_confidence * 0.6),
@@ -2627,16 +3006,22 @@ class YearlyPatternAnalyzer:
 
     def get_yearly_summary(self) -> Dict:
         """Get a summary of yearly analysis"""
-        years = sorted(self.yearly_data.keys())
+        years = self._sorted_years
+        recurring_hot = self._recurring_hot_cache
+        if recurring_hot is None:
+            recurring_hot = self._find_recurring_numbers(self.yearly_hot_numbers, min_years=2)
+        stable = self._stable_cache
+        if stable is None:
+            stable = self._find_stable_numbers()
         
         summary = {
-            'years_analyzed': years,
+            'years_analyzed': list(years),
             'total_years': len(years),
             'draws_per_year': {year: len(draws) for year, draws in self.yearly_data.items()},
             'patterns_detected': len(self.cross_year_patterns),
             'pattern_types': [p['type'] for p in self.cross_year_patterns],
-            'top_recurring_hot': self._find_recurring_numbers(self.yearly_hot_numbers, min_years=2)[:5],
-            'stable_foundation': self._find_stable_numbers()[:5]
+            'top_recurring_hot': recurring_hot[:5],
+            'stable_foundation': stable[:5]
         }
         
         return summary
@@ -2666,7 +3051,7 @@ class YearlyPatternAnalyzer:
         patterns = self.detect_cross_year_patterns()
         
         # Step 5: Get current year draws for prediction
-        current_year = max(self.yearly_data.keys()) if self.yearly_data else None
+        current_year = self._sorted_years[-1] if self._sorted_years else None
         current_year_draws = self.yearly_data.get(current_year, []) if current_year else []
         
         # Step 6: Get target lotto type (most common in current year, or from recent draws)
@@ -2704,7 +3089,9 @@ class EnhancedLottoOracle:
     """
 
     def __init__(self, historical_draws: List[List[int]], draw_dates: List[str] = None, lotto_types: List[str] = None):
-        self.historical = historical_draws
+        self.historical = Draws(historical_draws)
+        # Encoded history used to seed generate_predictions, with the history length it was built for
+        self._seed_data = (-1, b'')
         self.draw_dates = draw_dates  # Optional: dates for yearly organization
         self.lotto_types = lotto_types  # Optional: lotto types for yearly organization
         self.pattern_detector = AdvancedPatternDetector()
@@ -2838,9 +3225,12 @@ class EnhancedLottoOracle:
         print(f"DEBUG: strategy bytes: {strategy.encode('utf-8')}")
         
         # Create deterministic seed from input data
-        # Hash the historical data to create a stable seed
-        data_str = str(sorted([tuple(sorted(d)) for d in self.historical]))
-        seed = int(hashlib.md5((data_str + strategy).encode()).hexdigest()[:8], 16) % (2**31)
+        # Hash the historical data to create a stable seed (the history part
+        # only changes with the history, so it is built once)
+        if self._seed_data[0] != len(self.historical):
+            data_str = str(sorted([tuple(sorted(d)) for d in self.historical]))
+            self._seed_data = (len(self.historical), data_str.encode())
+        seed = int(hashlib.md5(self._seed_data[1] + strategy.encode()).hexdigest()[:8], 16) % (2**31)
         random.seed(seed)
         np.random.seed(seed % (2**31))
         
@@ -3083,7 +3473,7 @@ class EnhancedLottoOracle:
                                         for k in range(1, 91)}
                             # Boost scores with co-occurrence patterns
                             boosted_scores = intel_engine.boost_with_cooccurrence(all_scores)
-                            top_5 = sorted(boosted_scores.items(), key=lambda x: x[1], reverse=True)[:5]
+                            top_5 = heapq.nlargest(5, boosted_scores.items(), key=lambda x: x[1])
                             results['intelligence'] = [sorted([n for n, _ in top_5])]
                             print(f"Intelligence strategy: Using co-occurrence boosted unified scores")
                         except Exception as e:
@@ -3091,7 +3481,7 @@ class EnhancedLottoOracle:
                             # Absolute last resort
                             all_scores = {k: intel_engine.compute_unified_score(k) 
                                         for k in range(1, 91)}
-                            top_5 = sorted(all_scores.items(), key=lambda x: x[1], reverse=True)[:5]
+                            top_5 = heapq.nlargest(5, all_scores.items(), key=lambda x: x[1])
                             results['intelligence'] = [sorted([n for n, _ in top_5])]
             except Exception as e:
                 import traceback
@@ -3198,7 +3588,6 @@ class EnhancedLottoOracle:
             transfer_pred = None
             try:
                 # Get current date and lotto type for context
-                from datetime import datetime
                 current_date = datetime.now().strftime('%Y-%m-%d')
                 current_lotto_type = self.lotto_types[-1] if self.lotto_types and len(self.lotto_types) > 0 else None
                 
@@ -3428,7 +3817,7 @@ class EnhancedLottoOracle:
 
         # Store for tracking
         self.prediction_history.append({
-            'timestamp': pd.Timestamp.now(),
+            'timestamp': datetime.now(),
             'strategy': strategy,
             'predictions': results,
             'confidence': confidence_scores
@@ -3448,13 +3837,14 @@ class EnhancedLottoOracle:
         if not recent_draws:
             return {}
 
-        sums = [sum(draw) for draw in recent_draws]
-        evens = [sum(1 for n in draw if n % 2 == 0) for draw in recent_draws]
-        highs = [sum(1 for n in draw if n > 45) for draw in recent_draws]
+        arr = np.asarray(recent_draws, dtype=np.int32)
+        sums = arr.sum(axis=1)
+        evens = (~arr & 1).sum(axis=1)
+        highs = (arr > 45).sum(axis=1)
 
         # Calculate common patterns
-        even_mode = Counter(evens).most_common(1)[0][0]
-        high_mode = Counter(highs).most_common(1)[0][0]
+        even_mode = Counter(evens.tolist()).most_common(1)[0][0]
+        high_mode = Counter(highs.tolist()).most_common(1)[0][0]
 
         # Calculate number frequencies
         freq = Counter()
@@ -3464,16 +3854,15 @@ class EnhancedLottoOracle:
 
         hot_numbers = [num for num, _ in freq.most_common(15)]
 
-        # Calculate skip cycles
-        skips = {}
-        for num in range(1, 91):
-            skips[num] = 0
-            for i in range(len(recent_draws) - 1, -1, -1):
-                if num in recent_draws[i]:
-                    skips[num] = len(recent_draws) - i - 1
-                    break
+        # Calculate skip cycles (numbers never drawn keep a skip of 0)
+        last_seen = {}
+        for i, draw in enumerate(recent_draws):
+            for num in draw:
+                last_seen[num] = i
+        skips = {num: len(recent_draws) - last_seen[num] - 1 if num in last_seen else 0
+                 for num in range(1, 91)}
 
-        cold_numbers = sorted(skips.items(), key=lambda x: x[1], reverse=True)[:15]
+        cold_numbers = heapq.nlargest(15, skips.items(), key=lambda x: x[1])
         cold_numbers = [num for num, _ in cold_numbers]
 
         return {
@@ -3496,6 +3885,12 @@ class EnhancedLottoOracle:
         enhanced_probs = {}
         recent_window = min(10, len(self.historical))
         
+        # Recent winners and their co-occurrence counts over the last 20 draws
+        recent_winners = set()
+        for draw in self.historical[-5:]:
+            recent_winners.update(draw)
+        cooccur = self.historical.cooccurrence(20)
+        
         for num in range(1, 91):
             base_prob = probs.get(num, 0.0)
             recency_boost = 0.0
@@ -3507,16 +3902,11 @@ class EnhancedLottoOracle:
                     recency_boost += 0.15 * (1.0 + recency)  # Up to 0.3 boost
             
             # Boost numbers that co-occur with recent winners
-            recent_winners = set()
-            for draw in self.historical[-5:]:
-                recent_winners.update(draw)
-            
             cooccurrence_boost = 0.0
             for recent_num in recent_winners:
                 if recent_num != num:
                     # Check historical co-occurrence
-                    cooccur_count = sum(1 for draw in self.historical[-20:] 
-                                      if num in draw and recent_num in draw)
+                    cooccur_count = int(cooccur[num, recent_num])
                     if cooccur_count > 0:
                         cooccurrence_boost += 0.1 * min(cooccur_count / 3.0, 1.0)
             
@@ -3537,13 +3927,13 @@ class EnhancedLottoOracle:
         
         # Score remaining candidates by: probability + co-occurrence with selected
         candidate_scores = {}
+        cooccur_30 = self.historical.cooccurrence(30)
         for num, prob in sorted_nums[2:20]:  # Consider top 20
             if num not in selected:
                 score = prob
                 # Co-occurrence bonus with already selected numbers
                 for sel_num in selected:
-                    cooccur = sum(1 for draw in self.historical[-30:] 
-                                if num in draw and sel_num in draw)
+                    cooccur = int(cooccur_30[num, sel_num])
                     score += 0.1 * min(cooccur / 2.0, 1.0)
                 candidate_scores[num] = score
         
@@ -3620,24 +4010,30 @@ class EnhancedLottoOracle:
         max_freq = max(freq.values()) if freq else 1
         max_recency_freq = max(recency_freq.values()) if recency_freq else 1
         
+        # Pattern lookups shared by every number
+        hot_rank = {}
+        for rank, num in enumerate(patterns.get('hot_numbers', [])[:15]):  # Increased from 10
+            hot_rank.setdefault(num, rank)
+        very_cold = set(patterns.get('cold_numbers', [])[:5])
+        skips = patterns.get('skips', {})
+        avg_skip = np.mean(list(skips.values())) if skips else 10
+        
         # Build probability distribution from patterns
         for num in range(1, 91):
             score = 0.01  # Base score
             
             # Hot numbers boost
-            if num in patterns.get('hot_numbers', [])[:15]:  # Increased from 10
-                rank = patterns.get('hot_numbers', []).index(num) if num in patterns.get('hot_numbers', []) else 15
-                score += hot_weight * (1.0 - rank / 15.0)  # Higher rank = more boost
+            if num in hot_rank:
+                score += hot_weight * (1.0 - hot_rank[num] / 15.0)  # Higher rank = more boost
             
             # Cold numbers boost (if very cold)
-            if num in patterns.get('cold_numbers', [])[:5]:
-                skip = patterns.get('skips', {}).get(num, 0)
+            if num in very_cold:
+                skip = skips.get(num, 0)
                 if skip > 20:
                     score += cold_weight * min(skip / 30.0, 1.0)  # More cold = higher boost
             
             # Due numbers (around average skip)
-            avg_skip = np.mean(list(patterns.get('skips', {}).values())) if patterns.get('skips') else 10
-            skip = patterns.get('skips', {}).get(num, 0)
+            skip = skips.get(num, 0)
             if 0.8 * avg_skip <= skip <= 1.2 * avg_skip:
                 score += due_weight
             
@@ -3775,11 +4171,11 @@ class EnhancedLottoOracle:
         # Co-occurrence pattern bonus (NEW - important for wins)
         if len(candidate) >= 2:
             cooccur_bonus = 0.0
+            cooccur = self.historical.cooccurrence(30)
             for i, num1 in enumerate(candidate):
                 for num2 in candidate[i+1:]:
                     # Check historical co-occurrence
-                    cooccur_count = sum(1 for draw in self.historical[-30:] 
-                                      if num1 in draw and num2 in draw)
+                    cooccur_count = int(cooccur[num1, num2])
                     if cooccur_count >= 2:
                         cooccur_bonus += 0.5 * min(cooccur_count / 3.0, 1.0)
             score += cooccur_bonus